@@ -0,0 +1,38 @@
+# accounts/middleware.py
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+@database_sync_to_async
+def get_user_from_token(raw_token):
+    """Valida um access token JWT e retorna o usuário dono dele (ou None)"""
+    authentication = JWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    except (InvalidToken, TokenError):
+        return None
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Autentica conexões WebSocket via JWT passado em `?token=<access>`.
+
+    Deve ficar dentro do AuthMiddlewareStack: se não houver token, o usuário
+    da sessão (já resolvido pelo stack) é mantido.
+    """
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        raw_token = query.get('token', [None])[0]
+
+        if raw_token:
+            user = await get_user_from_token(raw_token)
+            if user is not None:
+                scope['user'] = user
+
+        return await super().__call__(scope, receive, send)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Character
+from .models import Character, MediaBlob, ModelUpload
 
 @admin.register(Character)
 class CharacterAdmin(admin.ModelAdmin):
@@ -24,4 +24,17 @@ class CharacterAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(ModelUpload)
+class ModelUploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'character', 'owner', 'received_size', 'total_size', 'status', 'updated_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'refcount', 'created_at')
+    search_fields = ('name', 'digest')
+    readonly_fields = ('name', 'digest', 'size', 'refcount', 'created_at')
@@ -0,0 +1,199 @@
+# characters/bestiary.py
+"""
+Importação e exportação em massa de bestiários.
+
+Importação: CSV, NDJSON (um objeto JSON por linha) ou um array JSON, lido com
+pandas em blocos de `chunk_size` linhas. Cada bloco é validado de uma vez
+(colunas inteiras, sem laço por linha) e gravado com `bulk_create`; linhas
+inválidas são puladas e relatadas com o número da linha no arquivo.
+
+    name,character_type,description,strength,dexterity,constitution,intelligence,wisdom,charisma,hit_points,speed
+    Goblin,monster,Pequeno e traiçoeiro,8,14,10,10,8,8,7,30
+
+Só `name` é obrigatório; as demais colunas usam os padrões do modelo
+(`character_type` = monster). Modificadores, iniciativa e CA são calculados por
+`Character.compute_derived_stats()`.
+
+Exportação: `export_rows` gera o arquivo linha a linha a partir de um
+queryset iterado em blocos, para uso com StreamingHttpResponse.
+"""
+import codecs
+import csv
+import json
+
+import pandas as pd
+from django.db import transaction
+
+from .models import ABILITIES, Character
+
+FORMATS = ('csv', 'jsonl', 'json')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+    'json': 'application/json',
+}
+INTEGER_COLUMNS = ABILITIES + ('hit_points', 'speed')
+COLUMNS = ('name', 'character_type', 'description') + INTEGER_COLUMNS
+EXPORT_COLUMNS = COLUMNS + ('armor_class', 'initiative_modifier')
+CHARACTER_TYPES = tuple(value for value, _ in Character.CHARACTER_TYPE_CHOICES)
+NAME_MAX_LENGTH = Character._meta.get_field('name').max_length
+
+# Limites aceitos na importação
+ABILITY_RANGE = (1, 30)
+HIT_POINTS_RANGE = (1, 10000)
+SPEED_RANGE = (0, 1000)
+# Quantos erros de linha são devolvidos no resumo
+MAX_REPORTED_ERRORS = 100
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_BATCH_SIZE = 1000
+
+
+def detect_format(filename, default='csv'):
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension == 'ndjson':
+        return 'jsonl'
+    return extension if extension in FORMATS else default
+
+
+def read_chunks(source, file_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lê o arquivo em DataFrames de até `chunk_size` linhas (texto, sem inferência de tipos)"""
+    if file_format == 'csv':
+        yield from pd.read_csv(
+            source, chunksize=chunk_size, dtype=str, keep_default_na=False, skipinitialspace=True
+        )
+    elif file_format == 'jsonl':
+        # O leitor de linhas do pandas só aceita texto; o upload chega em bytes
+        yield from pd.read_json(codecs.getreader('utf-8')(source), lines=True, chunksize=chunk_size, dtype=False)
+    elif file_format == 'json':
+        # Um array JSON não pode ser lido aos poucos; use NDJSON para arquivos grandes
+        frame = pd.read_json(codecs.getreader('utf-8')(source), dtype=False)
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start:start + chunk_size]
+    else:
+        raise ValueError(f"Formato inválido: {file_format}. Use um de: {', '.join(FORMATS)}")
+
+
+def _in_range(series, bounds):
+    return series.between(*bounds)
+
+
+def validate_chunk(frame):
+    """
+    Normaliza e valida um bloco inteiro de uma vez.
+
+    Retorna (DataFrame só com as linhas válidas, lista de erros por linha); o
+    índice do DataFrame é a linha de dados no arquivo (começando em 1).
+    """
+    frame = frame.rename(columns=lambda column: str(column).strip().lower())
+    if 'name' not in frame.columns:
+        raise ValueError('O arquivo precisa de uma coluna "name".')
+
+    data = pd.DataFrame(index=frame.index)
+    data['name'] = frame['name'].fillna('').astype(str).str.strip()
+    character_type = frame['character_type'] if 'character_type' in frame else pd.Series('', index=frame.index)
+    data['character_type'] = character_type.fillna('').astype(str).str.strip().str.lower().replace('', 'monster')
+    description = frame['description'] if 'description' in frame else pd.Series('', index=frame.index)
+    data['description'] = description.fillna('').astype(str)
+
+    problems = pd.Series('', index=frame.index)
+
+    def flag(mask, message):
+        problems[mask & (problems == '')] = message
+
+    flag(data['name'] == '', 'name vazio')
+    flag(data['name'].str.len() > NAME_MAX_LENGTH, f'name com mais de {NAME_MAX_LENGTH} caracteres')
+    flag(~data['character_type'].isin(CHARACTER_TYPES), f"character_type deve ser um de: {', '.join(CHARACTER_TYPES)}")
+
+    for column in INTEGER_COLUMNS:
+        default = Character._meta.get_field(column).default
+        if column in frame:
+            raw = frame[column].where(frame[column].astype(str).str.strip() != '')
+            values = pd.to_numeric(raw, errors='coerce')
+            flag(raw.notna() & (values.isna() | (values % 1 != 0)), f'{column} deve ser um número inteiro')
+            values = values.fillna(default)
+        else:
+            values = pd.Series(default, index=frame.index, dtype='float64')
+        bounds = ABILITY_RANGE if column in ABILITIES else HIT_POINTS_RANGE if column == 'hit_points' else SPEED_RANGE
+        flag(values.notna() & ~_in_range(values, bounds), f'{column} deve estar entre {bounds[0]} e {bounds[1]}')
+        data[column] = values
+
+    invalid = problems != ''
+    errors = [{'row': int(row), 'error': message} for row, message in problems[invalid].items()]
+    valid = data[~invalid].copy()
+    valid[list(INTEGER_COLUMNS)] = valid[list(INTEGER_COLUMNS)].astype('int64')
+    return valid, errors
+
+
+def build_characters(frame, owner):
+    characters = []
+    # to_dict devolve tipos nativos do Python (o banco não aceita numpy.int64)
+    for row in frame[list(COLUMNS)].to_dict('records'):
+        character = Character(owner=owner, **row)
+        character.compute_derived_stats()
+        characters.append(character)
+    return characters
+
+
+def import_bestiary(source, owner, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Importa um bestiário para `owner`; cada bloco é gravado em sua própria transação.
+
+    Retorna {"created": n, "skipped": n, "errors": [{"row", "error"}, ...]}.
+    """
+    created = skipped = 0
+    errors = []
+    offset = 0
+    for chunk in read_chunks(source, file_format, chunk_size):
+        # Índice = linha de dados no arquivo, contínuo entre blocos
+        chunk = chunk.reset_index(drop=True)
+        chunk.index += offset + 1
+        offset += len(chunk)
+
+        valid, chunk_errors = validate_chunk(chunk)
+        skipped += len(chunk_errors)
+        errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+        with transaction.atomic():
+            created += len(Character.objects.bulk_create(build_characters(valid, owner), batch_size=batch_size))
+
+    return {'created': created, 'skipped': skipped, 'errors': errors}
+
+
+class _Echo:
+    """Buffer de uma linha para o csv.writer (ele só chama write)"""
+
+    def write(self, value):
+        return value
+
+
+def _export_lines(rows, file_format):
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            yield writer.writerow(row)
+    elif file_format == 'jsonl':
+        for row in rows:
+            yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n'
+    else:
+        yield '['
+        for index, row in enumerate(rows):
+            yield (',\n' if index else '\n') + json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False)
+        yield '\n]\n'
+
+
+def export_rows(queryset, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE, lines_per_block=500):
+    """Gera o bestiário em blocos de texto, lendo o queryset em blocos de `chunk_size`"""
+    if file_format not in FORMATS:
+        raise ValueError(f"Formato inválido: {file_format}. Use um de: {', '.join(FORMATS)}")
+
+    rows = queryset.order_by('pk').values_list(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+    block = []
+    for line in _export_lines(rows, file_format):
+        block.append(line)
+        if len(block) >= lines_per_block:
+            yield ''.join(block)
+            block = []
+    if block:
+        yield ''.join(block)
@@ -0,0 +1,203 @@
+# characters/dice.py
+"""
+Motor de expressões de dados.
+
+Sintaxe suportada (combinável, sem diferenciar maiúsculas):
+
+    2d6+1d4+3     vários termos e constantes, com + e -
+    4d6kh3        mantém os 3 maiores (kl = menores, k = kh)
+    4d6dl1        descarta o menor (dh = descarta os maiores)
+    1d20adv       vantagem: rola o termo duas vezes e fica com o maior (dis = menor)
+    2d6r1         rerola uma vez os resultados <= 1
+    3d6!          dados explosivos: cada resultado máximo rola de novo e soma
+    d%            o mesmo que d100
+
+As expressões são analisadas uma única vez (cache) e avaliadas com NumPy em
+lote: `roll('8d6', times=30)` devolve 30 totais com um único sorteio por termo.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+MAX_DICE_PER_TERM = 1000
+MAX_SIDES = 1000
+MAX_TERMS = 20
+MAX_EXPLOSIONS = 20
+# Limite do valor absoluto das constantes (somadas) de uma expressão
+MAX_CONSTANT = 100_000
+# Limite de dados sorteados em uma única avaliação (vezes x dados)
+MAX_DICE_PER_CALL = 2_000_000
+
+_rng = np.random.default_rng()
+
+_TERM_RE = re.compile(
+    r'\s*(?P<sign>[+-])?\s*(?:'
+    r'(?P<count>\d*)d(?P<sides>\d+|%)(?P<modifiers>(?:kh\d+|kl\d+|k\d+|dh\d+|dl\d+|r\d+|!|adv|dis)*)'
+    r'|(?P<constant>\d+))\s*',
+    re.IGNORECASE,
+)
+_MODIFIER_RE = re.compile(r'(kh|kl|k|dh|dl|r)(\d+)|(!)|(adv|dis)', re.IGNORECASE)
+
+
+class DiceExpressionError(ValueError):
+    """Expressão de dados inválida ou grande demais"""
+
+
+@dataclass(frozen=True)
+class DiceTerm:
+    sign: int
+    count: int
+    sides: int
+    keep_highest: int | None = None
+    keep_lowest: int | None = None
+    reroll_at_most: int = 0
+    explode: bool = False
+    advantage: int = 0  # 1 = vantagem, -1 = desvantagem
+
+    def roll(self, times, rng):
+        """Rola o termo `times` vezes e retorna um array com os totais"""
+        totals = self._roll_once(times, rng)
+        if self.advantage:
+            second = self._roll_once(times, rng)
+            totals = np.maximum(totals, second) if self.advantage > 0 else np.minimum(totals, second)
+        return self.sign * totals
+
+    def _roll_once(self, times, rng):
+        if self.count == 0:
+            return np.zeros(times, dtype=np.int64)
+
+        values = rng.integers(1, self.sides + 1, size=(times, self.count))
+
+        if self.reroll_at_most:
+            mask = values <= self.reroll_at_most
+            values[mask] = rng.integers(1, self.sides + 1, size=int(mask.sum()))
+
+        if self.explode and self.sides > 1:
+            exploding = values == self.sides
+            for _ in range(MAX_EXPLOSIONS):
+                if not exploding.any():
+                    break
+                extra = rng.integers(1, self.sides + 1, size=int(exploding.sum()))
+                values[exploding] += extra
+                next_exploding = np.zeros_like(exploding)
+                next_exploding[exploding] = extra == self.sides
+                exploding = next_exploding
+
+        if self.keep_highest is not None:
+            values = np.sort(values, axis=1)[:, self.count - self.keep_highest:]
+        elif self.keep_lowest is not None:
+            values = np.sort(values, axis=1)[:, :self.keep_lowest]
+
+        return values.sum(axis=1)
+
+
+@dataclass(frozen=True)
+class DiceExpression:
+    text: str
+    terms: tuple
+    constant: int = 0
+
+    @property
+    def dice_per_roll(self):
+        """Quantidade de dados sorteados por avaliação (no pior caso sem explosões)"""
+        return sum(term.count * (2 if term.advantage else 1) for term in self.terms)
+
+    def roll(self, times=1, rng=None):
+        """Avalia a expressão `times` vezes; retorna um array NumPy de totais"""
+        if times < 1:
+            raise DiceExpressionError('O número de rolagens deve ser positivo.')
+        if self.dice_per_roll * times > MAX_DICE_PER_CALL:
+            raise DiceExpressionError('Rolagem grande demais para uma única chamada.')
+
+        rng = rng or _rng
+        totals = np.full(times, self.constant, dtype=np.int64)
+        for term in self.terms:
+            totals += term.roll(times, rng)
+        return totals
+
+
+def _number(digits, limit, message):
+    """Converte `digits` sem passar de `limit` (números enormes nem chegam ao int())"""
+    if len(digits.lstrip('0')) > len(str(limit)) or int(digits) > limit:
+        raise DiceExpressionError(message)
+    return int(digits)
+
+
+def _parse_term(match):
+    sign = -1 if match.group('sign') == '-' else 1
+
+    if match.group('constant') is not None:
+        return sign * _number(match.group('constant'), MAX_CONSTANT, f'Constantes de no máximo {MAX_CONSTANT}.')
+
+    count_limit = f'No máximo {MAX_DICE_PER_TERM} dados por termo.'
+    sides_limit = f'Os dados devem ter entre 1 e {MAX_SIDES} lados.'
+    count = _number(match.group('count'), MAX_DICE_PER_TERM, count_limit) if match.group('count') else 1
+    sides = 100 if match.group('sides') == '%' else _number(match.group('sides'), MAX_SIDES, sides_limit)
+    if sides < 1:
+        raise DiceExpressionError(sides_limit)
+
+    options = {}
+    for modifier in _MODIFIER_RE.finditer(match.group('modifiers') or ''):
+        name, value, explode, advantage = modifier.groups()
+        if explode:
+            options['explode'] = True
+        elif advantage:
+            options['advantage'] = 1 if advantage.lower() == 'adv' else -1
+        else:
+            name = name.lower()
+            value = _number(value, max(MAX_DICE_PER_TERM, MAX_SIDES), f'Modificador {name} grande demais.')
+            if name in ('kh', 'k', 'dl'):
+                options['keep_highest'] = value if name != 'dl' else count - value
+            elif name in ('kl', 'dh'):
+                options['keep_lowest'] = value if name == 'kl' else count - value
+            else:
+                options['reroll_at_most'] = value
+
+    for key in ('keep_highest', 'keep_lowest'):
+        if key in options and not 0 <= options[key] <= count:
+            raise DiceExpressionError('Não é possível manter/descartar mais dados do que os rolados.')
+    if 'keep_highest' in options and 'keep_lowest' in options:
+        raise DiceExpressionError('Use apenas um modificador de manter/descartar por termo.')
+    if options.get('reroll_at_most', 0) >= sides:
+        raise DiceExpressionError('A rerolagem precisa deixar algum resultado possível.')
+
+    return DiceTerm(sign=sign, count=count, sides=sides, **options)
+
+
+@lru_cache(maxsize=1024)
+def parse(expression):
+    """Analisa uma expressão de dados (resultado em cache por texto)"""
+    text = expression.strip()
+    if not text:
+        raise DiceExpressionError('Expressão vazia.')
+
+    terms = []
+    constant = 0
+    position = 0
+    while position < len(text):
+        match = _TERM_RE.match(text, position)
+        if not match or match.end() == position:
+            raise DiceExpressionError(f'Expressão inválida perto de "{text[position:]}".')
+        if position > 0 and match.group('sign') is None:
+            raise DiceExpressionError(f'Esperado + ou - perto de "{text[position:]}".')
+
+        term = _parse_term(match)
+        if isinstance(term, int):
+            constant += term
+        else:
+            terms.append(term)
+        position = match.end()
+
+    if len(terms) > MAX_TERMS:
+        raise DiceExpressionError(f'No máximo {MAX_TERMS} termos de dados por expressão.')
+    if abs(constant) > MAX_CONSTANT:
+        raise DiceExpressionError(f'Constantes de no máximo {MAX_CONSTANT}.')
+
+    return DiceExpression(text=text, terms=tuple(terms), constant=constant)
+
+
+def roll(expression, times=1, rng=None):
+    """Atalho: analisa (com cache) e rola a expressão `times` vezes"""
+    return parse(expression).roll(times, rng)
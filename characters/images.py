@@ -0,0 +1,161 @@
+# characters/images.py
+"""
+Derivados das imagens dos personagens (miniaturas e variantes WebP).
+
+Quando `Character.image` muda, `schedule_derivatives` agenda, para depois do
+commit, a geração dos tamanhos de DERIVATIVE_SIZES em um pool de threads fora
+da requisição. Cada tamanho é gravado ao lado do original em WebP e em um
+formato de reserva (JPEG, ou PNG se a imagem tiver transparência), e os nomes
+ficam em `Character.image_derivatives`:
+
+    {"source": "characters/elfo.png",
+     "thumb": {"webp": "characters/elfo__thumb.webp", "fallback": "characters/elfo__thumb.png"}, ...}
+
+As listagens usam a tag `{% character_picture %}` (templatetags/character_extras)
+e só a página de detalhes carrega o original.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Nome -> (largura, altura); recorte centralizado no tamanho exato
+DERIVATIVE_SIZES = {
+    'thumb': (96, 96),
+    'card': (320, 320),
+}
+WEBP_QUALITY = 80
+FALLBACK_QUALITY = 85
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_DERIVATIVE_WORKERS, thread_name_prefix='image-derivatives'
+        )
+    return _executor
+
+
+def derivative_name(source_name, size, extension):
+    stem, _ = os.path.splitext(source_name)
+    return f'{stem}__{size}.{extension}'
+
+
+def render_derivatives(source):
+    """Gera os bytes de cada derivado: {tamanho: {'webp': (ext, bytes), 'fallback': (ext, bytes)}}"""
+    image = ImageOps.exif_transpose(Image.open(source))
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    rendered = {}
+    for size, dimensions in DERIVATIVE_SIZES.items():
+        resized = ImageOps.fit(image, dimensions, Image.Resampling.LANCZOS)
+
+        webp = BytesIO()
+        resized.save(webp, 'WEBP', quality=WEBP_QUALITY, method=4)
+        fallback = BytesIO()
+        if has_alpha:
+            resized.save(fallback, 'PNG', optimize=True)
+            fallback_extension = 'png'
+        else:
+            resized.save(fallback, 'JPEG', quality=FALLBACK_QUALITY, optimize=True, progressive=True)
+            fallback_extension = 'jpg'
+
+        rendered[size] = {
+            'webp': ('webp', webp.getvalue()),
+            'fallback': (fallback_extension, fallback.getvalue()),
+        }
+    return rendered
+
+
+def delete_derivatives(storage, derivatives, character_id):
+    """Apaga os derivados, a menos que outro personagem ainda aponte para eles (ex.: clones do spawn)"""
+    from .models import Character
+
+    source = derivatives.get('source')
+    if source and Character.objects.filter(image_derivatives__source=source).exclude(pk=character_id).exists():
+        return
+    for size in DERIVATIVE_SIZES:
+        for name in (derivatives.get(size) or {}).values():
+            if name and storage.exists(name):
+                storage.delete(name)
+
+
+def render_and_save(storage, source_name):
+    try:
+        with storage.open(source_name, 'rb') as source:
+            rendered = render_derivatives(source)
+    except (FileNotFoundError, UnidentifiedImageError, OSError):
+        logger.warning('Não foi possível gerar derivados de %s', source_name, exc_info=True)
+        return None
+
+    derivatives = {'source': source_name}
+    for size, variants in rendered.items():
+        derivatives[size] = {}
+        for variant, (extension, content) in variants.items():
+            name = derivative_name(source_name, size, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            derivatives[size][variant] = storage.save(name, ContentFile(content))
+    return derivatives
+
+
+def generate_derivatives(character_id):
+    """Gera (ou regera) os derivados da imagem atual do personagem; retorna o dict gravado"""
+    from .models import Character
+
+    character = Character.objects.filter(pk=character_id).only('id', 'image', 'image_derivatives').first()
+    if character is None:
+        return None
+
+    storage = character.image.storage
+    source_name = character.image.name
+    if not source_name:
+        delete_derivatives(storage, character.image_derivatives, character_id)
+        Character.objects.filter(Q(image='') | Q(image__isnull=True), pk=character_id).update(image_derivatives={})
+        return {}
+
+    # Mesmo blob já usado por outro personagem (storage deduplicado): reaproveita os derivados
+    derivatives = Character.objects.filter(
+        image=source_name, image_derivatives__source=source_name
+    ).exclude(pk=character_id).values_list('image_derivatives', flat=True).first()
+    if derivatives is None:
+        derivatives = render_and_save(storage, source_name)
+        if derivatives is None:
+            return None
+
+    # Só grava se a imagem não mudou durante a geração (senão outro job cuida dela)
+    updated = Character.objects.filter(pk=character_id, image=source_name).update(image_derivatives=derivatives)
+    if not updated:
+        delete_derivatives(storage, derivatives, character_id)
+        return None
+
+    if character.image_derivatives.get('source') not in (None, source_name):
+        delete_derivatives(storage, character.image_derivatives, character_id)
+    return derivatives
+
+
+def _run(character_id):
+    try:
+        generate_derivatives(character_id)
+    except Exception:
+        logger.exception('Falha ao gerar derivados da imagem do personagem %s', character_id)
+    finally:
+        # Thread do pool: não deixar conexões abertas entre jobs
+        connection.close()
+
+
+def schedule_derivatives(character_id):
+    """Agenda a geração para depois do commit, fora da requisição"""
+    transaction.on_commit(lambda: _get_executor().submit(_run, character_id))
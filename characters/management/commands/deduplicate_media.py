@@ -0,0 +1,80 @@
+# characters/management/commands/deduplicate_media.py
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from characters.models import Character, MediaBlob
+from characters.storage import blob_storage, is_blob_name
+
+FIELDS = ('image', 'model_3d')
+
+
+class Command(BaseCommand):
+    help = 'Move imagens e modelos 3D antigos para o storage deduplicado e/ou recalcula as referências dos blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true',
+                            help='Recalcula a contagem de referências de todos os blobs a partir dos personagens')
+
+    def handle(self, *args, **options):
+        converted, legacy_names = self.convert_legacy_files()
+        removed = 0
+        for name in legacy_names:
+            if not Character.objects.filter(Q(image=name) | Q(model_3d=name)).exists():
+                blob_storage.delete(name)
+                removed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'{converted} personagens convertidos, {removed} arquivos duplicados removidos'
+        ))
+
+        if options['recount']:
+            fixed = self.recount()
+            self.stdout.write(self.style.SUCCESS(f'{fixed} blobs com contagem corrigida'))
+
+    def convert_legacy_files(self):
+        legacy = Q()
+        for field in FIELDS:
+            legacy |= (~Q(**{field: ''}) & Q(**{f'{field}__isnull': False}) & ~Q(**{f'{field}__startswith': 'blobs/'}))
+
+        converted = 0
+        legacy_names = set()
+        for character in Character.objects.filter(legacy).only('id', *FIELDS).iterator():
+            changed = []
+            for field in FIELDS:
+                field_file = getattr(character, field)
+                if not field_file or is_blob_name(field_file.name):
+                    continue
+                if not blob_storage.exists(field_file.name):
+                    self.stderr.write(f'Arquivo ausente: {field_file.name} (personagem {character.pk})')
+                    continue
+                with blob_storage.open(field_file.name, 'rb') as source:
+                    # O storage calcula o hash enquanto copia e devolve o nome do blob
+                    new_name = blob_storage.save(field_file.name, source)
+                legacy_names.add(field_file.name)
+                setattr(character, field, new_name)
+                changed.append(field)
+            if changed:
+                character.save(update_fields=changed)
+                converted += 1
+        return converted, legacy_names
+
+    def recount(self):
+        references = Counter()
+        for row in Character.objects.values_list(*FIELDS).iterator():
+            references.update(name for name in row if is_blob_name(name))
+
+        fixed = 0
+        for blob in MediaBlob.objects.all().iterator():
+            expected = references.pop(blob.name, 0)
+            if blob.refcount != expected:
+                MediaBlob.objects.filter(pk=blob.pk).update(refcount=expected)
+                fixed += 1
+        # Referências sem linha (ex.: bulk_create sem acquire)
+        MediaBlob.acquire(references.elements())
+        fixed += len(references)
+
+        orphaned = list(MediaBlob.objects.filter(refcount=0).values_list('name', flat=True))
+        MediaBlob.objects.filter(name__in=orphaned, refcount=0).delete()
+        blob_storage.purge(orphaned)
+        return fixed
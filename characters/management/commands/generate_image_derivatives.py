@@ -0,0 +1,27 @@
+# characters/management/commands/generate_image_derivatives.py
+from django.core.management.base import BaseCommand
+
+from characters.images import generate_derivatives
+from characters.models import Character
+
+
+class Command(BaseCommand):
+    help = 'Gera as miniaturas/WebP das imagens de personagens que ainda não têm (ou de todas, com --force)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Regera também os derivados já existentes')
+
+    def handle(self, *args, **options):
+        characters = Character.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image', 'image_derivatives')
+
+        generated = failed = 0
+        for character in characters.iterator():
+            if not options['force'] and character.image_derivatives.get('source') == character.image.name:
+                continue
+            if generate_derivatives(character.pk) is None:
+                failed += 1
+            else:
+                generated += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{generated} imagens processadas, {failed} com erro'))
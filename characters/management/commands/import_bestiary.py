@@ -0,0 +1,44 @@
+# characters/management/commands/import_bestiary.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from characters.bestiary import (
+    DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, FORMATS, detect_format, import_bestiary,
+)
+
+
+class Command(BaseCommand):
+    help = 'Importa um bestiário (CSV, NDJSON ou array JSON) em blocos para um usuário'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo a importar')
+        parser.add_argument('--owner', required=True, help='Username do dono dos personagens')
+        parser.add_argument('--format', choices=FORMATS, dest='file_format',
+                            help='Formato do arquivo (padrão: pela extensão)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Linhas lidas e validadas por bloco')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Linhas por INSERT no bulk_create')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário não encontrado: {options['owner']}")
+
+        file_format = options['file_format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as source:
+                summary = import_bestiary(
+                    source, owner, file_format,
+                    chunk_size=options['chunk_size'], batch_size=options['batch_size'],
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        for error in summary['errors']:
+            self.stderr.write(f"Linha {error['row']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['created']} personagens importados, {summary['skipped']} linhas ignoradas"
+        ))
@@ -0,0 +1,33 @@
+# characters/management/commands/recompute_character_stats.py
+from django.core.management.base import BaseCommand
+
+from characters.models import ABILITIES, DERIVED_FIELDS, Character
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as colunas derivadas dos personagens (modificadores, iniciativa e CA) após mudança de regra'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Personagens lidos e gravados por lote')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        characters = Character.objects.only('id', *ABILITIES, *DERIVED_FIELDS).order_by('pk')
+
+        updated = 0
+        batch = []
+        for character in characters.iterator(chunk_size=batch_size):
+            before = [getattr(character, field) for field in DERIVED_FIELDS]
+            character.compute_derived_stats()
+            if before != [getattr(character, field) for field in DERIVED_FIELDS]:
+                batch.append(character)
+            if len(batch) >= batch_size:
+                Character.objects.bulk_update(batch, DERIVED_FIELDS)
+                updated += len(batch)
+                batch = []
+        if batch:
+            Character.objects.bulk_update(batch, DERIVED_FIELDS)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} personagens atualizados'))
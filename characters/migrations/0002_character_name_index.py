@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='character',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def fill_derived_stats(apps, schema_editor):
+    # A regra vem do app (uma implementação só); o modelo histórico só fornece as colunas
+    from characters.models import ABILITIES, apply_derived_stats
+
+    Character = apps.get_model('characters', 'Character')
+    fields = [f'{ability}_modifier' for ability in ABILITIES] + ['initiative_modifier', 'armor_class']
+    batch = []
+    for character in Character.objects.only('id', *ABILITIES).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        apply_derived_stats(character)
+        batch.append(character)
+        if len(batch) >= BATCH_SIZE:
+            Character.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Character.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0002_character_name_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='charisma_modifier',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='constitution_modifier',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='dexterity_modifier',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='initiative_modifier',
+            field=models.SmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='intelligence_modifier',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='strength_modifier',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='wisdom_modifier',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['character_type', 'dexterity_modifier'], name='character_type_dex_idx'),
+        ),
+        migrations.RunPython(fill_derived_stats, migrations.RunPython.noop),
+    ]
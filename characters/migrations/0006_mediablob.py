@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:15
+
+import characters.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0005_modelupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='character',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=characters.storage.ContentAddressedStorage(), upload_to='characters/'),
+        ),
+        migrations.AlterField(
+            model_name='character',
+            name='model_3d',
+            field=models.FileField(blank=True, null=True, storage=characters.storage.ContentAddressedStorage(), upload_to='models_3d/'),
+        ),
+    ]
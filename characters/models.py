@@ -1,10 +1,41 @@
 # characters/models.py
-from django.db import models
+import uuid
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import Case, F, When
 from django.contrib.auth import get_user_model
-import random
+
+from . import dice
+from .storage import blob_digest, blob_storage, is_blob_name
 
 User = get_user_model()
 
+ABILITIES = ('strength', 'dexterity', 'constitution', 'intelligence', 'wisdom', 'charisma')
+# Colunas mantidas por Character.compute_derived_stats()
+DERIVED_FIELDS = tuple(f'{ability}_modifier' for ability in ABILITIES) + ('initiative_modifier', 'armor_class')
+# Rolagens de uma mesma chamada gravadas no histórico; o resto só volta na resposta
+MAX_LOGGED_ROLLS_PER_CALL = 20
+
+
+def ability_modifier(ability_score):
+    """Calcula modificador de habilidade: (score - 10) // 2"""
+    return (ability_score - 10) // 2
+
+
+def apply_derived_stats(character):
+    """
+    Preenche em memória as colunas derivadas a partir dos atributos.
+
+    Recebe qualquer objeto com os atributos, inclusive o modelo histórico da
+    migração que criou as colunas.
+    """
+    for ability in ABILITIES:
+        setattr(character, f'{ability}_modifier', ability_modifier(getattr(character, ability)))
+    character.initiative_modifier = character.dexterity_modifier
+    character.armor_class = 10 + character.dexterity_modifier
+
+
 class Character(models.Model):
     CHARACTER_TYPE_CHOICES = (
         ('player', 'Personagem Jogador'),
@@ -12,11 +43,14 @@ class Character(models.Model):
         ('monster', 'Monstro'),
     )
     
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
     character_type = models.CharField(max_length=10, choices=CHARACTER_TYPE_CHOICES)
     description = models.TextField(blank=True, null=True)
-    image = models.ImageField(upload_to='characters/', blank=True, null=True)
-    model_3d = models.FileField(upload_to='models_3d/', blank=True, null=True)
+    # Arquivos deduplicados por conteúdo (characters/storage.py)
+    image = models.ImageField(upload_to='characters/', storage=blob_storage, blank=True, null=True)
+    # Miniaturas/WebP geradas em segundo plano (characters/images.py)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
+    model_3d = models.FileField(upload_to='models_3d/', storage=blob_storage, blank=True, null=True)
     
     # Atributos D20
     strength = models.IntegerField(default=10)
@@ -26,8 +60,17 @@ class Character(models.Model):
     wisdom = models.IntegerField(default=10)
     charisma = models.IntegerField(default=10)
     
+    # Modificadores derivados dos atributos (mantidos em save(); ver DERIVED_FIELDS)
+    strength_modifier = models.SmallIntegerField(default=0, editable=False)
+    dexterity_modifier = models.SmallIntegerField(default=0, editable=False)
+    constitution_modifier = models.SmallIntegerField(default=0, editable=False)
+    intelligence_modifier = models.SmallIntegerField(default=0, editable=False)
+    wisdom_modifier = models.SmallIntegerField(default=0, editable=False)
+    charisma_modifier = models.SmallIntegerField(default=0, editable=False)
+    initiative_modifier = models.SmallIntegerField(default=0, editable=False, db_index=True)
+    
     # Informações de combate
-    armor_class = models.IntegerField(default=10)
+    armor_class = models.IntegerField(default=10)  # Derivada da Destreza em save()
     hit_points = models.IntegerField(default=10)
     speed = models.IntegerField(default=30)
     
@@ -40,40 +83,214 @@ class Character(models.Model):
         return f"{self.name} ({self.get_character_type_display()})"
 
     # === MÉTODOS DE CÁLCULO ===
-    def get_ability_modifier(self, ability_score):
+    @staticmethod
+    def get_ability_modifier(ability_score):
         """Calcula modificador de habilidade: (score - 10) // 2"""
-        return (ability_score - 10) // 2
+        return ability_modifier(ability_score)
 
     def get_initiative_modifier(self):
-        """Calcula o modificador de iniciativa baseado em Destreza"""
-        return self.get_ability_modifier(self.dexterity)
+        """Modificador de iniciativa (mod. de Destreza), gravado na coluna initiative_modifier"""
+        return self.initiative_modifier
 
     def get_armor_class(self):
-        """Calcula a classe de armadura (10 + mod. destreza)"""
-        return 10 + self.get_ability_modifier(self.dexterity)
+        """Classe de armadura (10 + mod. destreza), gravada na coluna armor_class"""
+        return self.armor_class
+
+    def compute_derived_stats(self):
+        """
+        Recalcula em memória todas as colunas derivadas dos atributos.
+
+        É a única implementação das regras: save(), bulk_create/bulk_update e o
+        comando recompute_character_stats passam por aqui (e a migração que
+        criou as colunas, via apply_derived_stats).
+        """
+        apply_derived_stats(self)
+
+    def roll_hit_points(self, count, variance=0, expression=None):
+        """
+        PV de `count` cópias deste personagem (array NumPy, mínimo 1): rolados com
+        `expression` (ex.: '2d6+3') ou os PV do personagem ± até `variance`.
+        """
+        import numpy as np
+
+        if expression:
+            hit_points = dice.roll(expression, count)
+        elif variance:
+            hit_points = self.hit_points + np.random.default_rng().integers(-variance, variance + 1, size=count)
+        else:
+            hit_points = np.full(count, self.hit_points)
+        return np.maximum(hit_points, 1)
 
     def roll_dice(self, dice_count=1, dice_sides=20, bonus=0):
         """Rola dados genéricos"""
-        total = sum(random.randint(1, dice_sides) for _ in range(dice_count)) + bonus
+        total = int(dice.roll(f"{dice_count}d{dice_sides}")[0]) + bonus
         return total
 
+    def roll_expression(self, expression, times=1):
+        """
+        Rola uma expressão de dados (ex.: '4d6kh3', '1d20adv+5') `times` vezes de uma só vez.
+
+        Só as primeiras MAX_LOGGED_ROLLS_PER_CALL rolagens vão para o histórico.
+        """
+        from initiative.models import RollRecord
+
+        totals = dice.roll(expression, times)
+        self._log_rolls(RollRecord.KIND_DICE, totals[:MAX_LOGGED_ROLLS_PER_CALL].tolist(), expression[:50])
+        return totals
+
     def roll_initiative(self):
         """Rola iniciativa: d20 + mod. destreza"""
         return self.roll_dice(1, 20, self.get_initiative_modifier())
 
-    def roll_attack(self, attack_bonus=0):
+    def roll_attack(self, attack_bonus=0, room=None):
         """Rola ataque: d20 + bônus de ataque"""
-        return self.roll_dice(1, 20, attack_bonus)
+        from initiative.models import RollRecord
+
+        total = self.roll_dice(1, 20, attack_bonus)
+        self._log_rolls(RollRecord.KIND_ATTACK, [total], f"1d20{attack_bonus:+d}", room)
+        return total
 
-    def roll_damage(self, dice_count=1, dice_sides=6, bonus=0):
+    def roll_damage(self, dice_count=1, dice_sides=6, bonus=0, room=None):
         """Rola dano com mínimo de 1"""
-        total = self.roll_dice(dice_count, dice_sides, bonus)
-        return max(1, total)
+        from initiative.models import RollRecord
+
+        total = max(1, self.roll_dice(dice_count, dice_sides, bonus))
+        self._log_rolls(RollRecord.KIND_DAMAGE, [total], f"{dice_count}d{dice_sides}{bonus:+d}", room)
+        return total
+
+    def _log_rolls(self, kind, results, detail, room=None):
+        """Envia as rolagens para o histórico (gravado em lote, fora da requisição)"""
+        from django.utils import timezone
+        from initiative.models import RollRecord
+        from initiative.roll_log import roll_log
+
+        rolled_at = timezone.now()
+        roll_log.extend([
+            RollRecord(
+                kind=kind,
+                character_id=self.pk,
+                room_id=room.pk if room is not None else None,
+                result=result,
+                detail=detail,
+                rolled_at=rolled_at,
+            )
+            for result in results
+        ])
 
     def save(self, *args, **kwargs):
-        """Garante que armor_class seja calculado automaticamente"""
-        self.armor_class = self.get_armor_class()
+        """Garante que os modificadores e a armor_class sejam calculados automaticamente"""
+        self.compute_derived_stats()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(ABILITIES) & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, *DERIVED_FIELDS}
         super().save(*args, **kwargs)
 
+        # Imagem nova (ou removida): derivados gerados fora da requisição
+        image_name = self.image.name or ''
+        if image_name != self.image_derivatives.get('source', ''):
+            if update_fields is None or 'image' in update_fields:
+                from .images import schedule_derivatives
+                schedule_derivatives(self.pk)
+
+    def get_image_derivative(self, size, variant='webp'):
+        """Nome do arquivo derivado da imagem atual, se já foi gerado"""
+        if not self.image or self.image_derivatives.get('source') != self.image.name:
+            return None
+        return (self.image_derivatives.get(size) or {}).get(variant)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            # Filtros como "monstros com mod. de DES >= 3"
+            models.Index(fields=['character_type', 'dexterity_modifier'], name='character_type_dex_idx'),
+        ]
+
+
+class ModelUpload(models.Model):
+    """
+    Upload em partes (retomável) de um modelo 3D; ver characters/uploads.py.
+
+    Cada parte recebida vira um arquivo no storage; `received_size` é o
+    próximo byte esperado, então o cliente retoma a partir dele.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_COMPLETE = 'complete'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Em andamento'),
+        (STATUS_COMPLETE, 'Concluído'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    character = models.ForeignKey(Character, on_delete=models.CASCADE, related_name='model_uploads')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='model_uploads')
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received_size = models.PositiveBigIntegerField(default=0)
+    part_count = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_size}/{self.total_size})"
+
+    @property
+    def is_complete(self):
+        return self.status == self.STATUS_COMPLETE
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class MediaBlob(models.Model):
+    """
+    Arquivo único do storage endereçado por conteúdo e quantas vezes ele é usado
+    em `Character.image`/`Character.model_3d`.
+
+    A contagem é mantida pelos signals (characters/signals.py); quem grava sem
+    signals (bulk_create, update) chama `acquire`/`release` diretamente.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+    @staticmethod
+    def _count(names):
+        return Counter(name for name in names if is_blob_name(name))
+
+    @classmethod
+    def acquire(cls, names):
+        """Soma uma referência para cada nome (repetidos contam mais de uma vez)"""
+        for name, count in cls._count(names).items():
+            if cls.objects.filter(name=name).update(refcount=F('refcount') + count):
+                continue
+            size = blob_storage.size(name) if blob_storage.exists(name) else 0
+            blob, created = cls.objects.get_or_create(
+                name=name, defaults={'digest': blob_digest(name), 'size': size, 'refcount': count}
+            )
+            if not created:
+                cls.objects.filter(pk=blob.pk).update(refcount=F('refcount') + count)
+
+    @classmethod
+    def release(cls, names):
+        """Tira as referências; blobs que ficam sem nenhuma são apagados após o commit"""
+        counts = cls._count(names)
+        if not counts:
+            return
+        with transaction.atomic():
+            for name, count in counts.items():
+                cls.objects.filter(name=name).update(refcount=Case(
+                    When(refcount__gt=count, then=F('refcount') - count), default=0
+                ))
+            orphaned = list(cls.objects.filter(name__in=counts, refcount=0).values_list('name', flat=True))
+            cls.objects.filter(name__in=orphaned, refcount=0).delete()
+        if orphaned:
+            transaction.on_commit(lambda: blob_storage.purge(orphaned))
+
     class Meta:
-        ordering = ['name']
\ No newline at end of file
+        ordering = ['name']
@@ -1,17 +1,44 @@
 from rest_framework import serializers
-from .models import Character
+from django.conf import settings
+from .models import Character, ModelUpload
 
 class CharacterSerializer(serializers.ModelSerializer):
-    initiative_modifier = serializers.ReadOnlyField()
-    armor_class_calculated = serializers.ReadOnlyField()
+    # Modificadores e CA são colunas mantidas em Character.save()
+    armor_class_calculated = serializers.ReadOnlyField(source='armor_class')
 
     class Meta:
         model = Character
         fields = '__all__'
-        read_only_fields = ('owner', 'created_at', 'updated_at')
+        read_only_fields = ('owner', 'armor_class', 'created_at', 'updated_at')
 
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        representation['initiative_modifier'] = instance.get_initiative_modifier()
-        representation['armor_class_calculated'] = instance.get_armor_class()
-        return representation
\ No newline at end of file
+class DiceRollSerializer(serializers.Serializer):
+    expression = serializers.CharField(max_length=200)
+    count = serializers.IntegerField(min_value=1, max_value=10000, default=1)
+    label = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+    def validate_expression(self, value):
+        from .dice import DiceExpressionError, parse
+        try:
+            parse(value)
+        except DiceExpressionError as error:
+            raise serializers.ValidationError(str(error))
+        return value
+
+
+class DiceBatchRollSerializer(serializers.Serializer):
+    rolls = DiceRollSerializer(many=True, allow_empty=False, max_length=100)
+
+class ModelUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ModelUpload
+        fields = ('id', 'character', 'filename', 'total_size', 'received_size', 'status', 'created_at', 'updated_at')
+        read_only_fields = fields
+
+class ModelUploadCreateSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_size(self, value):
+        if value > settings.MODEL_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'O modelo pode ter no máximo {settings.MODEL_UPLOAD_MAX_SIZE} bytes.')
+        return value
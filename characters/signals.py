@@ -0,0 +1,60 @@
+# characters/signals.py
+"""
+Mantém a contagem de referências dos blobs (MediaBlob) usados em
+`Character.image` e `Character.model_3d`; ver characters/storage.py.
+"""
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Character, MediaBlob
+
+BLOB_FIELDS = ('image', 'model_3d')
+
+
+def loaded_value(instance, field):
+    # Lê direto do __dict__ para não disparar a carga de campos adiados (.only()/.defer())
+    value = instance.__dict__.get(field)
+    return getattr(value, 'name', value) or ''
+
+
+def saved_fields(instance, update_fields):
+    fields = [field for field in BLOB_FIELDS if field in instance.__dict__]
+    return fields if update_fields is None else [field for field in fields if field in update_fields]
+
+
+@receiver(post_init, sender=Character)
+def remember_blobs(sender, instance, **kwargs):
+    instance._loaded_blobs = {
+        field: loaded_value(instance, field) for field in BLOB_FIELDS if field in instance.__dict__
+    }
+
+
+@receiver(pre_save, sender=Character)
+def load_previous_blobs(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Campo adiado que foi carregado/alterado depois: o valor antigo vem do banco
+    if raw or instance._state.adding:
+        return
+    unknown = [field for field in saved_fields(instance, update_fields) if field not in instance._loaded_blobs]
+    if unknown:
+        previous = Character.objects.filter(pk=instance.pk).values(*unknown).first() or {}
+        instance._loaded_blobs.update({field: previous.get(field) or '' for field in unknown})
+
+
+@receiver(post_save, sender=Character)
+def update_blob_references(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    acquired, released = [], []
+    for field in saved_fields(instance, update_fields):
+        current = loaded_value(instance, field)
+        previous = '' if created else instance._loaded_blobs.get(field, '')
+        if current != previous:
+            acquired.append(current)
+            released.append(previous)
+        instance._loaded_blobs[field] = current
+
+    MediaBlob.acquire(acquired)
+    MediaBlob.release(released)
+
+
+@receiver(post_delete, sender=Character)
+def release_blobs(sender, instance, **kwargs):
+    MediaBlob.release(loaded_value(instance, field) for field in BLOB_FIELDS)
@@ -0,0 +1,117 @@
+# characters/storage.py
+"""
+Storage endereçado por conteúdo para as imagens e modelos 3D dos personagens.
+
+Cada arquivo enviado é gravado uma única vez, com o SHA-256 calculado enquanto
+ele é copiado (em blocos, sem ler o arquivo inteiro em memória):
+
+    blobs/3f/3fa1...c9.glb
+
+Se o blob já existe a cópia temporária é descartada e o campo passa a apontar
+para o arquivo existente. As referências de cada blob ficam em `MediaBlob`
+(mantidas pelos signals de characters/signals.py); quando a última referência
+some o blob é apagado junto com seus derivados (`<hash>__thumb.webp`, ...).
+
+Arquivos antigos fora de `blobs/` continuam funcionando como antes; o comando
+`deduplicate_media` os converte.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_ROOT = 'blobs'
+_TEMP_DIR = f'{BLOB_ROOT}/tmp'
+# Extensões maiores que isso são descartadas do nome do blob
+MAX_EXTENSION_LENGTH = 10
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_ROOT}/') and not name.startswith(f'{_TEMP_DIR}/')
+
+
+def blob_digest(name):
+    """'blobs/3f/3fa1...c9__thumb.webp' -> '3fa1...c9' (blob de origem dos derivados)"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return stem.split('__', 1)[0]
+
+
+def blob_name(digest, extension):
+    return f'{BLOB_ROOT}/{digest[:2]}/{digest}{extension}'
+
+
+def _extension(name):
+    extension = os.path.splitext(name)[1].lower()
+    return extension if len(extension) <= MAX_EXTENSION_LENGTH else ''
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage que deduplica os arquivos pelo conteúdo"""
+
+    def get_available_name(self, name, max_length=None):
+        # O nome final depende só do conteúdo; nunca recebe sufixo aleatório
+        return name
+
+    def _save(self, name, content):
+        # Derivados de um blob (ex.: miniaturas) já chegam com o nome do conteúdo de origem
+        fixed_name = name if is_blob_name(name) else None
+        if fixed_name and self.exists(fixed_name):
+            return fixed_name
+
+        os.makedirs(self.path(_TEMP_DIR), exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.path(_TEMP_DIR))
+        try:
+            with os.fdopen(fd, 'wb') as target:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    target.write(chunk)
+
+            name = fixed_name or blob_name(digest.hexdigest(), _extension(name))
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                return name
+
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # Dois envios simultâneos do mesmo conteúdo gravam os mesmos bytes
+            os.replace(temp_path, full_path)
+            if self.file_permissions_mode is not None:
+                os.chmod(full_path, self.file_permissions_mode)
+            return name
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def delete(self, name):
+        """Blobs (e derivados) ainda referenciados por algum personagem não são apagados"""
+        if is_blob_name(name):
+            from .models import MediaBlob
+
+            if MediaBlob.objects.filter(digest=blob_digest(name), refcount__gt=0).exists():
+                return
+        super().delete(name)
+
+    def purge(self, names):
+        """Apaga blobs sem referências, com os derivados gerados a partir deles"""
+        from .models import MediaBlob
+
+        for name in names:
+            digest = blob_digest(name)
+            if MediaBlob.objects.filter(digest=digest).exists():
+                continue  # Referenciado de novo (ou mesmo conteúdo com outra extensão)
+            directory = os.path.dirname(name)
+            try:
+                _, files = self.listdir(directory)
+            except FileNotFoundError:
+                continue
+            for filename in files:
+                if blob_digest(filename) == digest:
+                    super().delete(f'{directory}/{filename}')
+
+
+blob_storage = ContentAddressedStorage()
@@ -1,4 +1,5 @@
 from django import template
+from django.utils.html import format_html
     
 register = template.Library()
 
@@ -16,4 +17,32 @@ def add_sign(value):
         return f"+{val}" if val > 0 else str(val)
     except (ValueError, TypeError):
         # Retorna o valor original se não for um número válido (ex: None, string)
-        return value
\ No newline at end of file
+        return value
+
+@register.simple_tag
+def character_picture(character, size='thumb', css_class=''):
+    """
+    <picture> com o derivado WebP e o de reserva do tamanho pedido ('thumb' ou 'card').
+    Enquanto os derivados não ficam prontos, usa a imagem original; sem imagem, não renderiza nada.
+    Uso: {% character_picture character 'thumb' 'w-12 h-12 rounded-full' %}
+    """
+    if not character.image:
+        return ''
+
+    from characters.images import DERIVATIVE_SIZES
+
+    width, height = DERIVATIVE_SIZES[size]
+    storage = character.image.storage
+    webp = character.get_image_derivative(size, 'webp')
+    fallback = character.get_image_derivative(size, 'fallback')
+    if not (webp and fallback):
+        return format_html(
+            '<img src="{}" alt="{}" width="{}" height="{}" loading="lazy" class="{}">',
+            character.image.url, character.name, width, height, css_class,
+        )
+
+    return format_html(
+        '<picture><source srcset="{}" type="image/webp">'
+        '<img src="{}" alt="{}" width="{}" height="{}" loading="lazy" class="{}"></picture>',
+        storage.url(webp), storage.url(fallback), character.name, width, height, css_class,
+    )
@@ -1,3 +1,34 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .dice import MAX_CONSTANT, DiceExpressionError, parse, roll
+from .models import Character
+
+
+class DiceLimitTests(TestCase):
+    def test_huge_numbers_are_rejected_while_parsing(self):
+        for expression in (
+            '1d20+99999999999999999999',
+            f'1d20+{MAX_CONSTANT}+1',
+            '1d' + '9' * 5000,
+            '9' * 30 + 'd6',
+            '4d6kh' + '9' * 30,
+        ):
+            with self.subTest(expression=expression), self.assertRaises(DiceExpressionError):
+                parse(expression)
+
+    def test_constant_at_the_limit_still_rolls(self):
+        self.assertEqual(roll(f'{MAX_CONSTANT}', times=2).tolist(), [MAX_CONSTANT, MAX_CONSTANT])
+
+    def test_endpoint_answers_400(self):
+        owner = get_user_model().objects.create_user('dono', password='x')
+        character = Character.objects.create(name='Herói', owner=owner)
+        client = APIClient()
+        client.force_authenticate(owner)
+        response = client.post(
+            f'/api/v1/characters/{character.pk}/roll/',
+            {'expression': '1d20+99999999999999999999', 'count': 1},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,204 @@
+# characters/uploads.py
+"""
+Upload retomável em partes e download com Range do `Character.model_3d`.
+
+Upload:
+    1. POST   /api/v1/characters/<pk>/model-uploads/  {"filename", "size"}
+    2. PUT    /api/v1/characters/model-uploads/<id>/  corpo = bytes da parte,
+              cabeçalho `Content-Range: bytes <início>-<fim>/<total>`
+    3. GET    /api/v1/characters/model-uploads/<id>/  mostra `received_size`
+              para retomar depois de uma queda.
+
+Cada parte é copiada em blocos direto para um arquivo no storage (nada fica
+inteiro em memória). Quando o último byte chega as partes são concatenadas,
+também em blocos, em `model_3d.save()` e apagadas.
+
+Download: `iter_range` lê do storage só o intervalo pedido, em blocos.
+"""
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+BLOCK_SIZE = 64 * 1024
+# Partes até este tamanho ficam em memória antes de ir para o storage
+SPOOL_SIZE = 1024 * 1024
+
+# As partes têm nome fixo (upload + índice): regravar uma parte substitui o
+# arquivo em vez de criar outro com sufixo, então o nome calculado é sempre o gravado
+part_storage = FileSystemStorage(allow_overwrite=True)
+
+_CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(ValueError):
+    """Parte inválida; `received_size` indica de onde o cliente deve continuar"""
+
+    def __init__(self, message, received_size=None, status=400):
+        super().__init__(message)
+        self.received_size = received_size
+        self.status = status
+
+
+def part_name(upload, index):
+    return f'uploads/models_3d/{upload.pk}/{index:06d}.part'
+
+
+def parse_content_range(header, total_size):
+    """'bytes 0-1048575/5000000' -> (início, fim inclusivo)"""
+    match = _CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        raise UploadError('Envie o cabeçalho Content-Range: bytes <início>-<fim>/<total>.')
+    start, end, total = (int(group) for group in match.groups())
+    if total != total_size or start > end or end >= total_size:
+        raise UploadError('Content-Range incompatível com o tamanho do upload.')
+    return start, end
+
+
+def receive_part(upload_id, stream, content_range):
+    """
+    Grava uma parte do upload e, se for a última, monta o arquivo final.
+
+    Só aceita a parte que começa em `received_size`; partes repetidas ou fora
+    de ordem são recusadas com o ponto de retomada.
+    """
+    from .models import ModelUpload
+
+    upload = ModelUpload.objects.get(pk=upload_id)
+    if upload.is_complete:
+        raise UploadError('Upload já concluído.', upload.received_size, status=409)
+
+    start, end = parse_content_range(content_range, upload.total_size)
+    length = end - start + 1
+    if start != upload.received_size:
+        raise UploadError('Parte fora de ordem.', upload.received_size, status=409)
+    if length > settings.MODEL_UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(f'Partes de no máximo {settings.MODEL_UPLOAD_MAX_CHUNK_SIZE} bytes.', upload.received_size)
+
+    name = part_name(upload, upload.part_count)
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as buffer:
+        copied = _copy(stream, buffer, length)
+        if copied != length:
+            raise UploadError('Corpo menor que o Content-Range.', upload.received_size)
+        buffer.seek(0)
+        part_storage.save(name, File(buffer))
+
+    # Avança o ponteiro só se ninguém gravou esta mesma parte em paralelo
+    advanced = ModelUpload.objects.filter(
+        pk=upload.pk, received_size=start, status=ModelUpload.STATUS_PENDING
+    ).update(received_size=end + 1, part_count=upload.part_count + 1)
+    if not advanced:
+        upload.refresh_from_db()
+        raise UploadError('Parte enviada em paralelo.', upload.received_size, status=409)
+
+    upload.received_size = end + 1
+    upload.part_count += 1
+    if upload.received_size == upload.total_size:
+        assemble(upload)
+    return upload
+
+
+def _copy(source, target, length):
+    copied = 0
+    while copied < length:
+        block = source.read(min(BLOCK_SIZE, length - copied))
+        if not block:
+            break
+        target.write(block)
+        copied += len(block)
+    return copied
+
+
+class _PartsReader:
+    """Arquivo somente leitura que encadeia as partes do storage em sequência"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.current = None
+
+    def read(self, size=-1):
+        while self.names or self.current:
+            if self.current is None:
+                self.current = part_storage.open(self.names.pop(0), 'rb')
+            block = self.current.read(size if size and size > 0 else BLOCK_SIZE)
+            if block:
+                return block
+            self.current.close()
+            self.current = None
+        return b''
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+
+
+def assemble(upload):
+    """Concatena as partes em `Character.model_3d` e apaga as partes"""
+    from .models import ModelUpload
+
+    names = [part_name(upload, index) for index in range(upload.part_count)]
+    reader = _PartsReader(names)
+    character = upload.character
+    try:
+        with transaction.atomic():
+            previous = character.model_3d.name
+            character.model_3d.save(os.path.basename(upload.filename), File(reader), save=False)
+            character.save(update_fields=['model_3d', 'updated_at'])
+            ModelUpload.objects.filter(pk=upload.pk).update(status=ModelUpload.STATUS_COMPLETE)
+            upload.status = ModelUpload.STATUS_COMPLETE
+    finally:
+        reader.close()
+
+    for name in names:
+        part_storage.delete(name)
+    if previous and previous != character.model_3d.name:
+        character.model_3d.storage.delete(previous)
+    return character
+
+
+def discard_parts(upload):
+    for index in range(upload.part_count):
+        part_storage.delete(part_name(upload, index))
+
+
+def parse_range(header, size):
+    """
+    Um único intervalo 'bytes=a-b', 'bytes=a-' ou 'bytes=-n' -> (início, fim inclusivo).
+
+    Retorna None para cabeçalho ausente ou não suportado (responde o arquivo
+    todo) e levanta ValueError se o intervalo não puder ser atendido (416).
+    """
+    match = _RANGE_RE.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError('Intervalo vazio')
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Intervalo fora do arquivo')
+    return start, end
+
+
+def iter_range(field_file, start, end):
+    """Lê [start, end] do arquivo em blocos, sem carregar o arquivo inteiro"""
+    with field_file.storage.open(field_file.name, 'rb') as source:
+        source.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = source.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
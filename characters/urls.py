@@ -3,6 +3,12 @@ from . import views
 
 urlpatterns = [
     path('', views.CharacterListCreateView.as_view(), name='character-list'),
+    path('import/', views.import_bestiary, name='character-import'),
+    path('export/', views.export_bestiary, name='character-export'),
     path('<int:pk>/', views.CharacterDetailView.as_view(), name='character-detail'),
+    path('<int:pk>/roll/', views.roll_dice, name='character-roll'),
+    path('<int:pk>/model/', views.download_model_3d, name='character-model-3d'),
+    path('<int:pk>/model-uploads/', views.create_model_upload, name='character-model-upload'),
+    path('model-uploads/<uuid:upload_id>/', views.model_upload_detail, name='model-upload-detail'),
     path('<int:pk>/delete/', views.CharacterDeleteView.as_view(), name='character-delete-template'),
 ]
\ No newline at end of file
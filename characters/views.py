@@ -1,11 +1,27 @@
-from rest_framework import generics, permissions
+import hashlib
+import mimetypes
+import os
+
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
 from django.views.generic import (
     ListView, CreateView, UpdateView, DeleteView, DetailView
 ) # Importar Views de Classe para Templates
-from django.urls import reverse_lazy # Para redirecionamento após sucesso
+from django.urls import reverse, reverse_lazy # Para redirecionamento após sucesso
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date
 
-from .models import Character
-from .serializers import CharacterSerializer
+from .models import DERIVED_FIELDS, Character, ModelUpload
+from .serializers import (
+    CharacterSerializer, DiceBatchRollSerializer, ModelUploadCreateSerializer, ModelUploadSerializer,
+)
+from .dice import DiceExpressionError
+from . import bestiary, uploads
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 
 try:
@@ -16,11 +32,38 @@ except ImportError:
 # ==================== VIEWS BASEADAS EM CLASSE (API - DRF) ====================
 
 class CharacterListCreateView(generics.ListCreateAPIView):
+    """
+    Personagens do usuário, com filtros sobre as colunas derivadas:
+    ?character_type=monster&min_dexterity_modifier=3&ordering=-initiative_modifier
+    (min_/max_ valem para qualquer modificador e para armor_class)
+    """
     serializer_class = CharacterSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering_fields = ('name', 'hit_points', 'created_at') + DERIVED_FIELDS
 
     def get_queryset(self):
-        return Character.objects.filter(owner=self.request.user)
+        queryset = Character.objects.filter(owner=self.request.user)
+        params = self.request.query_params
+
+        if params.get('character_type'):
+            queryset = queryset.filter(character_type=params['character_type'])
+
+        for field in DERIVED_FIELDS:
+            for prefix, lookup in (('min', 'gte'), ('max', 'lte')):
+                value = params.get(f'{prefix}_{field}')
+                if value is None:
+                    continue
+                try:
+                    queryset = queryset.filter(**{f'{field}__{lookup}': int(value)})
+                except ValueError:
+                    raise ValidationError({f'{prefix}_{field}': 'Deve ser um número inteiro.'})
+
+        ordering = params.get('ordering')
+        if ordering:
+            if ordering.lstrip('-') not in self.ordering_fields:
+                raise ValidationError({'ordering': f"Use um de: {', '.join(self.ordering_fields)}"})
+            queryset = queryset.order_by(ordering, 'pk')
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -31,7 +74,207 @@ class CharacterDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         return Character.objects.filter(owner=self.request.user)
-    
+
+
+# ==================== VIEWS BASEADAS EM FUNÇÃO (API - DRF) ====================
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def roll_dice(request, pk):
+    """
+    Rola várias expressões de dados de uma vez para um personagem
+    POST /api/v1/characters/<pk>/roll/
+
+    Corpo: {"rolls": [{"expression": "8d6", "count": 30, "label": "bola de fogo"}]}
+    ou uma única rolagem: {"expression": "1d20adv+5", "count": 1}
+    """
+    # Dono do personagem ou mestre de uma sala em que ele está
+    character = get_object_or_404(
+        Character.objects.filter(
+            Q(owner=request.user) | Q(rooms__master=request.user)
+        ).distinct(),
+        pk=pk,
+    )
+
+    data = request.data if 'rolls' in request.data else {'rolls': [request.data]}
+    serializer = DiceBatchRollSerializer(data=data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    results = []
+    try:
+        for roll in serializer.validated_data['rolls']:
+            totals = character.roll_expression(roll['expression'], roll['count'])
+            results.append({
+                'expression': roll['expression'],
+                'label': roll.get('label', ''),
+                'totals': totals.tolist(),
+            })
+    except DiceExpressionError as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'character': character.pk, 'results': results})
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def create_model_upload(request, pk):
+    """
+    Inicia o upload em partes do modelo 3D do personagem (somente o dono)
+    POST /api/v1/characters/<pk>/model-uploads/  {"filename": "dragao.glb", "size": 73400320}
+    """
+    character = get_object_or_404(Character, pk=pk, owner=request.user)
+    serializer = ModelUploadCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    upload = ModelUpload.objects.create(
+        character=character,
+        owner=request.user,
+        filename=serializer.validated_data['filename'],
+        total_size=serializer.validated_data['size'],
+    )
+    return Response(ModelUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def model_upload_detail(request, upload_id):
+    """
+    GET: progresso (para retomar); PUT: envia uma parte; DELETE: cancela.
+    PUT /api/v1/characters/model-uploads/<id>/  (Content-Range: bytes 0-8388607/73400320)
+    """
+    upload = get_object_or_404(ModelUpload, pk=upload_id, owner=request.user)
+
+    if request.method == 'GET':
+        return Response(ModelUploadSerializer(upload).data)
+
+    if request.method == 'DELETE':
+        if not upload.is_complete:
+            uploads.discard_parts(upload)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    try:
+        # O corpo é lido direto do stream da requisição, em blocos
+        upload = uploads.receive_part(upload.pk, request.stream, request.headers.get('Content-Range'))
+    except uploads.UploadError as error:
+        return Response(
+            {'error': str(error), 'received_size': error.received_size},
+            status=error.status
+        )
+
+    data = ModelUploadSerializer(upload).data
+    if upload.is_complete:
+        data['model_3d'] = request.build_absolute_uri(reverse('character-model-3d', kwargs={'pk': upload.character_id}))
+        return Response(data, status=status.HTTP_201_CREATED)
+    return Response(data)
+
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([permissions.IsAuthenticated])
+def download_model_3d(request, pk):
+    """
+    Download do modelo 3D com suporte a Range/If-Range (visualizadores carregam aos poucos)
+    GET /api/v1/characters/<pk>/model/
+    Dono do personagem ou participante de uma sala em que ele está.
+    """
+    from rooms.models import Room
+
+    character = get_object_or_404(
+        Character.objects.only('id', 'owner_id', 'model_3d', 'updated_at'), pk=pk
+    )
+    if character.owner_id != request.user.pk and not Room.objects.visible_to(request.user).filter(
+        characters=character
+    ).exists():
+        return Response({'error': 'Personagem não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    if not character.model_3d:
+        return Response({'error': 'Personagem sem modelo 3D'}, status=status.HTTP_404_NOT_FOUND)
+
+    field_file = character.model_3d
+    size = field_file.size
+    etag = '"%s"' % hashlib.md5(f'{field_file.name}:{size}'.encode(), usedforsecurity=False).hexdigest()
+    last_modified = http_date(character.updated_at.timestamp())
+    content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range in (etag, last_modified):
+        try:
+            byte_range = uploads.parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    else:
+        response = StreamingHttpResponse(uploads.iter_range(field_file, start, end), content_type=content_type)
+    if byte_range is not None:
+        response.status_code = status.HTTP_206_PARTIAL_CONTENT
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Content-Disposition'] = f'inline; filename="{os.path.basename(field_file.name)}"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@parser_classes([MultiPartParser])
+def import_bestiary(request):
+    """
+    Importa um bestiário (CSV, NDJSON ou JSON) em massa; ver characters/bestiary.py
+    POST /api/v1/characters/import/  (multipart: file=@bestiario.csv [, file_format=jsonl])
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'Envie o arquivo no campo "file"'}, status=status.HTTP_400_BAD_REQUEST)
+
+    file_format = request.data.get('file_format') or bestiary.detect_format(upload.name)
+    if file_format not in bestiary.FORMATS:
+        return Response(
+            {'error': f"Formato inválido. Use um de: {', '.join(bestiary.FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        summary = bestiary.import_bestiary(upload, request.user, file_format)
+    except ValueError as error:
+        # Arquivo ilegível (pandas) ou sem a coluna obrigatória; blocos anteriores já foram gravados
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(summary, status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_bestiary(request):
+    """
+    Exporta os personagens do usuário em streaming
+    GET /api/v1/characters/export/?file_format=csv|jsonl|json&character_type=monster
+    """
+    file_format = request.query_params.get('file_format', 'csv')
+    if file_format not in bestiary.FORMATS:
+        return Response(
+            {'error': f"Formato inválido. Use um de: {', '.join(bestiary.FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    queryset = Character.objects.filter(owner=request.user)
+    if request.query_params.get('character_type'):
+        queryset = queryset.filter(character_type=request.query_params['character_type'])
+
+    response = StreamingHttpResponse(
+        bestiary.export_rows(queryset, file_format), content_type=bestiary.CONTENT_TYPES[file_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="bestiario.{file_format}"'
+    return response
+
 
 # ==================== VIEWS BASEADAS EM CLASSE (Templates - Django CBV) ====================
 
@@ -13,4 +13,22 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+# Inicializa o Django antes de importar consumers/middlewares que usam models
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from accounts.middleware import JWTAuthMiddleware  # noqa: E402
+from rooms.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    # WebSockets: sessão (AuthMiddlewareStack) ou JWT em ?token=
+    'websocket': AllowedHostsOriginValidator(
+        AuthMiddlewareStack(
+            JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+        )
+    ),
+})
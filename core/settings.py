@@ -124,3 +124,30 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Channels (WebSockets)
 ASGI_APPLICATION = 'core.asgi.application'
+
+# Em memória por padrão (desenvolvimento/testes locais, um único processo)
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': config('CHANNEL_LAYER_BACKEND', default='channels.layers.InMemoryChannelLayer'),
+    }
+}
+
+
+# Simulação de encontros (rooms/simulation.py): processos do comando simulate_encounter (a API usa um só)
+ENCOUNTER_SIMULATION_WORKERS = config('ENCOUNTER_SIMULATION_WORKERS', default=os.cpu_count() or 1, cast=int)
+# Limite de tentativas x combatentes de uma simulação pela API (acima disso, 400)
+ENCOUNTER_SIMULATION_MAX_SIZE = config('ENCOUNTER_SIMULATION_MAX_SIZE', default=2_000_000, cast=int)
+
+# Histórico de rolagens (initiative/roll_log.py): gravação em lote
+ROLL_LOG_BATCH_SIZE = config('ROLL_LOG_BATCH_SIZE', default=200, cast=int)
+ROLL_LOG_FLUSH_INTERVAL_MS = config('ROLL_LOG_FLUSH_INTERVAL_MS', default=1000, cast=int)
+
+# Miniaturas/WebP das imagens de personagens (characters/images.py): threads do pool
+IMAGE_DERIVATIVE_WORKERS = config('IMAGE_DERIVATIVE_WORKERS', default=2, cast=int)
+
+# Upload em partes de modelos 3D (characters/uploads.py)
+MODEL_UPLOAD_MAX_SIZE = config('MODEL_UPLOAD_MAX_SIZE', default=512 * 1024 * 1024, cast=int)
+MODEL_UPLOAD_MAX_CHUNK_SIZE = config('MODEL_UPLOAD_MAX_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+
+# Entrada por código (rooms/codes.py): tempo no cache da resolução código -> sala
+ROOM_CODE_CACHE_TIMEOUT = config('ROOM_CODE_CACHE_TIMEOUT', default=300, cast=int)
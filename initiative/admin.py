@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Initiative
+from .models import Initiative, InitiativeRoundArchive, RollRecord
 
 @admin.register(Initiative)
 class InitiativeAdmin(admin.ModelAdmin):
@@ -12,10 +12,23 @@ class InitiativeAdmin(admin.ModelAdmin):
             'fields': ('room', 'character', 'initiative_roll', 'initiative_bonus', 'initiative_total')
         }),
         ('Controle de Turno', {
-            'fields': ('initiative_round', 'current_turn', 'completed')
+            'fields': ('initiative_round', 'turn_order', 'current_turn', 'completed')
         }),
         ('Metadados', {
             'fields': ('created_at',),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(RollRecord)
+class RollRecordAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'result', 'detail', 'character', 'room', 'initiative_round', 'rolled_at')
+    list_filter = ('kind', 'rolled_at')
+    search_fields = ('character__name', 'room__name')
+
+
+@admin.register(InitiativeRoundArchive)
+class InitiativeRoundArchiveAdmin(admin.ModelAdmin):
+    list_display = ('room', 'initiative_round', 'archived_at')
+    search_fields = ('room__name',)
+    readonly_fields = ('archived_at',)
@@ -0,0 +1,103 @@
+# initiative/archive.py
+"""
+Arquivamento de rodadas de iniciativa encerradas.
+
+Tudo o que está abaixo de `Room.current_initiative_round` vira uma linha de
+`InitiativeRoundArchive` por rodada e sai da tabela `initiative_initiative`,
+que fica só com a rodada viva.
+"""
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Initiative, InitiativeRoundArchive
+
+ARCHIVE_VALUES = (
+    'room_id', 'initiative_round', 'character_id', 'character__name', 'initiative_roll',
+    'initiative_bonus', 'initiative_total', 'turn_order', 'completed', 'horde_id', 'horde_group',
+    'horde__name', 'horde__initiative_groups',
+)
+
+
+def archive_entry(row):
+    """Linha de ARCHIVE_VALUES -> entrada na ordem de ENTRY_FIELDS (grupos de horda levam o nome do grupo)"""
+    from rooms.models import Horde
+
+    _, _, character_id, name, *values, horde_id, horde_group, horde_name, initiative_groups = row
+    if horde_id:
+        name = Horde.format_group_label(horde_name, horde_group, initiative_groups)
+    return [character_id, name, *values, horde_id, horde_group]
+
+
+def finished_initiatives(room_ids=None):
+    """Iniciativas de rodadas anteriores à rodada atual de cada sala"""
+    finished = Initiative.objects.filter(initiative_round__lt=F('room__current_initiative_round'))
+    if room_ids:
+        finished = finished.filter(room_id__in=room_ids)
+    return finished
+
+
+def archive_room(room_id, chunk_size=2000):
+    """Arquiva as rodadas encerradas de uma sala; retorna (rodadas, iniciativas) movidas"""
+    from rooms.models import Room
+
+    with transaction.atomic():
+        rows = (
+            finished_initiatives([room_id])
+            .order_by('initiative_round', 'turn_order')
+            .values_list(*ARCHIVE_VALUES)
+            .iterator(chunk_size=chunk_size)
+        )
+        rounds = {
+            initiative_round: [archive_entry(row) for row in group]
+            for initiative_round, group in groupby(rows, key=lambda row: row[1])
+        }
+        if not rounds:
+            return 0, 0
+
+        # Uma rodada pode já ter sido arquivada parcialmente (ex.: rolagem tardia)
+        existing = {
+            archive.initiative_round: archive
+            for archive in InitiativeRoundArchive.objects.filter(
+                room_id=room_id, initiative_round__in=rounds
+            )
+        }
+        archives = [
+            InitiativeRoundArchive(
+                room_id=room_id,
+                initiative_round=initiative_round,
+                entries=(existing[initiative_round].entries if initiative_round in existing else []) + entries,
+            )
+            for initiative_round, entries in rounds.items()
+        ]
+        InitiativeRoundArchive.objects.bulk_create(
+            archives,
+            update_conflicts=True,
+            unique_fields=['room', 'initiative_round'],
+            update_fields=['entries', 'archived_at'],
+        )
+        deleted, _ = Initiative.objects.filter(
+            room_id=room_id, initiative_round__in=list(rounds)
+        ).delete()
+        # A listagem de iniciativas da sala mudou (ETag)
+        Room.bump_state_version([room_id])
+
+    return len(rounds), deleted
+
+
+def archive_finished_rounds(room_ids=None):
+    """Arquiva as rodadas encerradas de todas as salas (ou das indicadas), uma sala por transação"""
+    pending_rooms = (
+        finished_initiatives(room_ids)
+        .order_by()
+        .values_list('room_id', flat=True)
+        .distinct()
+    )
+    totals = {'rooms': 0, 'rounds': 0, 'initiatives': 0}
+    for room_id in list(pending_rooms):
+        rounds, initiatives = archive_room(room_id)
+        totals['rooms'] += 1
+        totals['rounds'] += rounds
+        totals['initiatives'] += initiatives
+    return totals
@@ -0,0 +1,210 @@
+# initiative/live.py
+"""
+Acompanhamento da iniciativa para clientes sem WebSocket.
+
+Duas views assíncronas (rodam no `core/asgi.py` sem prender uma thread por
+cliente em espera):
+
+- long-poll: `GET room/<id>/poll/?since=<seq>&timeout=<s>` responde assim que
+  houver algo novo (ou no timeout);
+- Server-Sent Events: `GET room/<id>/events/` mantém a resposta aberta.
+
+O cursor é a `sequence` dos RoomEvent da sala: o cliente manda a última que
+viu (`since` ou o cabeçalho `Last-Event-ID`) e recebe só os deltas
+posteriores. A espera é feita no grupo do channel layer da sala, o mesmo
+usado pelo WebSocket, então nada consulta o banco enquanto a sala está parada.
+Eventos ao vivo que não viram RoomEvent (ex.: `initiative.rolled`) são
+repassados como notificações.
+
+Autenticação: sessão ou `Authorization: Bearer <access JWT>`.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from accounts.middleware import get_user_from_token
+from rooms.broadcast import room_group_name
+
+DEFAULT_POLL_TIMEOUT = 25
+MAX_POLL_TIMEOUT = 60
+# Comentário SSE enviado periodicamente para manter proxies com a conexão aberta
+KEEPALIVE_SECONDS = 15
+MAX_EVENTS = 500
+
+
+async def authenticate(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+
+    scheme, _, raw_token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and raw_token:
+        return await get_user_from_token(raw_token.strip())
+    return None
+
+
+def event_payload(event):
+    return {
+        'sequence': event.sequence,
+        'kind': event.kind,
+        'delta': event.delta,
+        'reverted': event.reverted,
+        'created_at': event.created_at.isoformat(),
+    }
+
+
+@sync_to_async
+def room_changes(room_id, user, since):
+    """Estado atual e eventos com sequence > since; None se o usuário não participa da sala"""
+    from rooms.event_store import STATE_FIELDS, room_state
+    from rooms.models import Room, RoomEvent
+
+    room = (
+        Room.objects.visible_to(user)
+        .filter(pk=room_id)
+        .only('id', 'state_version', *STATE_FIELDS)
+        .first()
+    )
+    if room is None:
+        return None
+
+    events = RoomEvent.objects.filter(room_id=room_id, sequence__gt=since).order_by('sequence')[:MAX_EVENTS]
+    return {
+        'state_version': room.state_version,
+        'state': room_state(room),
+        'events': [event_payload(event) for event in events],
+    }
+
+
+class RoomSubscription:
+    """Canal próprio no grupo da sala enquanto o cliente espera"""
+
+    def __init__(self, room_id):
+        self.group = room_group_name(room_id)
+        self.channel_layer = get_channel_layer()
+        self.channel = None
+
+    async def __aenter__(self):
+        if self.channel_layer is not None:
+            self.channel = await self.channel_layer.new_channel()
+            await self.channel_layer.group_add(self.group, self.channel)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.channel is not None:
+            await self.channel_layer.group_discard(self.group, self.channel)
+
+    async def receive(self, timeout):
+        """Próxima mensagem da sala ou None se o tempo acabar"""
+        try:
+            if self.channel is None:
+                await asyncio.sleep(timeout)
+                return None
+            return await asyncio.wait_for(self.channel_layer.receive(self.channel), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def notification(message):
+    return {'event': message['event'], 'data': message['data']}
+
+
+def parse_cursor(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def error_response(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+@require_GET
+async def poll_initiative(request, room_id):
+    """
+    Long-poll das mudanças de iniciativa da sala.
+    GET /api/v1/initiative/room/<room_id>/poll/?since=<sequence>&timeout=25
+    """
+    user = await authenticate(request)
+    if user is None:
+        return error_response('Autenticação necessária', 401)
+
+    since = parse_cursor(request.GET.get('since'))
+    try:
+        timeout = min(max(float(request.GET.get('timeout', DEFAULT_POLL_TIMEOUT)), 0), MAX_POLL_TIMEOUT)
+    except ValueError:
+        return error_response('timeout deve ser um número', 400)
+
+    changes = await room_changes(room_id, user, since)
+    if changes is None:
+        return error_response('Sala não encontrada', 404)
+
+    notifications = []
+    if not changes['events'] and timeout:
+        async with RoomSubscription(room_id) as subscription:
+            # Consulta de novo já inscrito: algo pode ter mudado antes do group_add
+            changes = await room_changes(room_id, user, since)
+            if changes is not None and not changes['events']:
+                message = await subscription.receive(timeout)
+                if message is not None:
+                    notifications.append(notification(message))
+                    changes = await room_changes(room_id, user, since)
+        if changes is None:
+            return error_response('Sala não encontrada', 404)
+
+    changes['notifications'] = notifications
+    return JsonResponse(changes)
+
+
+def sse_message(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, separators=(",", ":"))}']
+    return '\n'.join(lines) + '\n\n'
+
+
+@require_GET
+async def stream_initiative(request, room_id):
+    """
+    Server-Sent Events das mudanças de iniciativa da sala.
+    GET /api/v1/initiative/room/<room_id>/events/   (retoma a partir de Last-Event-ID)
+
+    Eventos: `transition` (RoomEvent, com id = sequence) e os eventos ao vivo
+    da sala (`initiative.rolled`, `turn.changed`, ...).
+    """
+    user = await authenticate(request)
+    if user is None:
+        return error_response('Autenticação necessária', 401)
+
+    since = parse_cursor(request.headers.get('Last-Event-ID', request.GET.get('since')))
+    if await room_changes(room_id, user, since) is None:
+        return error_response('Sala não encontrada', 404)
+
+    async def stream():
+        last_sequence = since
+        async with RoomSubscription(room_id) as subscription:
+            message = None
+            while True:
+                changes = await room_changes(room_id, user, last_sequence)
+                if changes is None:
+                    # Saiu da sala (ou ela foi apagada) durante o stream
+                    return
+                for event in changes['events']:
+                    last_sequence = event['sequence']
+                    yield sse_message('transition', event, event_id=event['sequence'])
+                if message is not None:
+                    yield sse_message(message['event'], message['data'])
+
+                message = await subscription.receive(KEEPALIVE_SECONDS)
+                while message is None:
+                    yield ': keepalive\n\n'
+                    message = await subscription.receive(KEEPALIVE_SECONDS)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,19 @@
+# initiative/management/commands/archive_initiative_rounds.py
+from django.core.management.base import BaseCommand
+
+from initiative.archive import archive_finished_rounds
+
+
+class Command(BaseCommand):
+    help = 'Move as rodadas de iniciativa encerradas para o arquivo compacto por sala'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, action='append', dest='rooms',
+                            help='Arquiva só esta sala (pode repetir)')
+
+    def handle(self, *args, **options):
+        totals = archive_finished_rounds(options['rooms'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['rounds']} rodadas arquivadas ({totals['initiatives']} iniciativas) "
+            f"em {totals['rooms']} salas"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('initiative', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='initiative',
+            name='turn_order',
+            field=models.IntegerField(default=0),
+        ),
+    ]
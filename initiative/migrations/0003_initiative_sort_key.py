@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+SORT_KEY_OFFSET = 5000
+
+
+def fill_sort_key(apps, schema_editor):
+    Initiative = apps.get_model('initiative', 'Initiative')
+    initiatives = list(Initiative.objects.select_related('character').only(
+        'id', 'initiative_total', 'character__name'
+    ))
+    for initiative in initiatives:
+        initiative.sort_key = f"{SORT_KEY_OFFSET - initiative.initiative_total:04d}{initiative.character.name}"
+    Initiative.objects.bulk_update(initiatives, ['sort_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0001_initial'),
+        ('initiative', '0002_initiative_turn_order'),
+        ('rooms', '0002_room_initiative_count'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='initiative',
+            options={'ordering': ['sort_key']},
+        ),
+        migrations.AddField(
+            model_name='initiative',
+            name='sort_key',
+            field=models.CharField(default='', editable=False, max_length=110),
+        ),
+        migrations.RunPython(fill_sort_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='initiative',
+            index=models.Index(fields=['room', 'initiative_round', 'sort_key'], name='initiative_queue_idx'),
+        ),
+    ]
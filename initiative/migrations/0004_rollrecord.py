@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0001_initial'),
+        ('initiative', '0003_initiative_sort_key'),
+        ('rooms', '0002_room_initiative_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('initiative_round', models.IntegerField(blank=True, null=True)),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Iniciativa'), (2, 'Ataque'), (3, 'Dano'), (4, 'Dados')])),
+                ('result', models.IntegerField()),
+                ('detail', models.CharField(blank=True, max_length=50)),
+                ('rolled_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('character', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='roll_records', to='characters.character')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='roll_records', to='rooms.room')),
+            ],
+            options={
+                'ordering': ['-rolled_at', '-id'],
+                'indexes': [models.Index(fields=['room', 'initiative_round', 'rolled_at'], name='rollrecord_room_idx'), models.Index(fields=['character', 'rolled_at'], name='rollrecord_character_idx')],
+            },
+        ),
+    ]
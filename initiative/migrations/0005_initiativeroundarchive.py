@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('initiative', '0004_rollrecord'),
+        ('rooms', '0002_room_initiative_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InitiativeRoundArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('initiative_round', models.IntegerField()),
+                ('entries', models.JSONField(default=list)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_rounds', to='rooms.room')),
+            ],
+            options={
+                'ordering': ['-initiative_round'],
+                'unique_together': {('room', 'initiative_round')},
+            },
+        ),
+    ]
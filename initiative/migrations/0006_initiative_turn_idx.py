@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0002_character_name_index'),
+        ('initiative', '0005_initiativeroundarchive'),
+        ('rooms', '0006_room_state_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='initiative',
+            index=models.Index(fields=['room', 'initiative_round', 'turn_order'], name='initiative_turn_idx'),
+        ),
+    ]
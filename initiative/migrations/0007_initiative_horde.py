@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0006_mediablob'),
+        ('initiative', '0006_initiative_turn_idx'),
+        ('rooms', '0007_horde'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='initiative',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='initiative',
+            name='horde',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='initiatives', to='rooms.horde'),
+        ),
+        migrations.AddField(
+            model_name='initiative',
+            name='horde_group',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterUniqueTogether(
+            name='initiative',
+            unique_together={('room', 'character', 'horde_group', 'initiative_round')},
+        ),
+    ]
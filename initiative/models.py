@@ -1,13 +1,30 @@
 # initiative/models.py
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
-import random
+from django.utils import timezone
+import numpy as np
 
 User = get_user_model()
 
+# Gerador compartilhado: os d20 de uma rodada inteira saem de um único sorteio vetorizado
+_rng = np.random.default_rng()
+
+# Desloca o total para que a chave de ordenação seja sempre positiva com 4 dígitos
+SORT_KEY_OFFSET = 5000
+SORT_KEY_DIGITS = 4
+
+
+def roll_d20(size=1):
+    """Rola `size` d20 de uma só vez e retorna um array NumPy"""
+    return _rng.integers(1, 21, size=size)
+
+
 class Initiative(models.Model):
     room = models.ForeignKey('rooms.Room', on_delete=models.CASCADE, related_name='initiatives')
     character = models.ForeignKey('characters.Character', on_delete=models.CASCADE)
+    # Entrada de um grupo de horda: `character` é o modelo da horda e `horde_group` o grupo (0 = personagem comum)
+    horde = models.ForeignKey('rooms.Horde', on_delete=models.CASCADE, related_name='initiatives', null=True, blank=True)
+    horde_group = models.PositiveSmallIntegerField(default=0)
     
     # Dados da iniciativa
     initiative_roll = models.IntegerField()  # Resultado do d20
@@ -16,48 +33,294 @@ class Initiative(models.Model):
     
     # Controle de rodada e turno
     initiative_round = models.IntegerField(default=0)
+    turn_order = models.IntegerField(default=0)  # Posição na fila da rodada (0 = primeiro)
+    # Chave de ordenação desnormalizada: total decrescente + nome do personagem (desempate)
+    sort_key = models.CharField(max_length=110, default='', editable=False)
     current_turn = models.BooleanField(default=False)
     completed = models.BooleanField(default=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.character.name} - {self.initiative_total} (d{self.initiative_roll} + {self.initiative_bonus})"
+        return f"{self.combatant_name} - {self.initiative_total} (d{self.initiative_roll} + {self.initiative_bonus})"
+
+    @property
+    def combatant_name(self):
+        """Nome na fila: o do personagem, ou o do grupo da horda (use select_related('character', 'horde'))"""
+        return self.horde.group_label(self.horde_group) if self.horde_id else self.character.name
+
+    @staticmethod
+    def build_sort_key(initiative_total, character_name):
+        """
+        Monta a chave que ordena a fila: '-initiative_total, character__name'.
+
+        O total é invertido e preenchido com zeros para que a ordem crescente
+        da string seja a ordem decrescente do total, seguida do nome.
+        """
+        return f"{SORT_KEY_OFFSET - initiative_total:0{SORT_KEY_DIGITS}d}{character_name}"
+
+    def save(self, *args, **kwargs):
+        """Mantém a chave de ordenação em dia a cada gravação"""
+        self.sort_key = self.build_sort_key(self.initiative_total, self.combatant_name)
+        super().save(*args, **kwargs)
 
     def roll_initiative(self):
         """Rola a iniciativa usando o método do personagem"""
-        # Usa o método do Character para rolar
-        self.initiative_roll = random.randint(1, 20)
+        from rooms.broadcast import broadcast_room_event, initiative_payload
+
+        self.initiative_roll = int(roll_d20()[0])
         self.initiative_bonus = self.character.get_initiative_modifier()
         self.initiative_total = self.initiative_roll + self.initiative_bonus
-        self.save()
+        with transaction.atomic():
+            self.save()
+            ranked = {initiative.pk: initiative for initiative in type(self).rank_round(self.room)}
+        if self.pk in ranked:
+            self.turn_order = ranked[self.pk].turn_order
+            self.current_turn = ranked[self.pk].current_turn
+
+        broadcast_room_event(self.room_id, 'initiative.rolled', initiative_payload(self))
         return self.initiative_total
 
+    @staticmethod
+    def combatants(characters, hordes=()):
+        """Entradas da fila como (personagem, horda, grupo, nome): os personagens e os grupos vivos das hordas"""
+        combatants = [(character, None, 0, character.name) for character in characters]
+        for horde in hordes:
+            combatants.extend(
+                (horde.template, horde, group, horde.group_label(group)) for group in horde.living_groups()
+            )
+        return combatants
+
+    @staticmethod
+    def room_combatants(room):
+        """Personagens e hordas da sala, só com o necessário para a fila: (personagens, hordas)"""
+        # Uma query para os personagens da sala inteira e uma para as hordas
+        characters = room.characters.only('id', 'name', 'initiative_modifier')
+        hordes = room.hordes.select_related('template').only(
+            'id', 'name', 'size', 'hit_points', 'initiative_groups',
+            'template__id', 'template__name', 'template__initiative_modifier',
+        )
+        return characters, hordes
+
+    @classmethod
+    def roll_for_characters(cls, room, characters, hordes=(), record=True):
+        """
+        Rola iniciativa para vários personagens (e grupos de hordas) de uma vez.
+
+        Todos os d20 saem de um único sorteio vetorizado e a rodada inteira é
+        gravada com um único upsert (bulk_create com update_conflicts), então o
+        custo em queries não depende do número de combatentes. Cada grupo de
+        horda com alguma criatura viva é uma entrada, com o bônus do modelo.
+        `record` é repassado a rank_round.
+        """
+        return cls.roll_combatants(room, cls.combatants(characters, hordes), record=record)
+
+    @classmethod
+    def roll_combatants(cls, room, combatants, record=True):
+        """Rola e grava as entradas de `combatants` (ver `combatants`) e reordena a rodada"""
+        if not combatants:
+            cls.rank_round(room, record=record)
+            return []
+
+        bonuses = np.fromiter(
+            (character.initiative_modifier for character, _, _, _ in combatants),
+            dtype=np.int64,
+            count=len(combatants),
+        )
+        rolls = roll_d20(len(combatants))
+        totals = rolls + bonuses
+
+        initiatives = [
+            cls(
+                room=room,
+                character=character,
+                horde=horde,
+                horde_group=group,
+                initiative_roll=int(roll),
+                initiative_bonus=int(bonus),
+                initiative_total=int(total),
+                initiative_round=room.current_initiative_round,
+                sort_key=cls.build_sort_key(int(total), name),
+            )
+            for (character, horde, group, name), roll, bonus, total in zip(combatants, rolls, bonuses, totals)
+        ]
+        with transaction.atomic():
+            initiatives = cls.objects.bulk_create(
+                initiatives,
+                update_conflicts=True,
+                unique_fields=['room', 'character', 'horde_group', 'initiative_round'],
+                update_fields=[
+                    'initiative_roll', 'initiative_bonus', 'initiative_total',
+                    'sort_key', 'current_turn', 'completed',
+                ],
+            )
+            ranked = {initiative.pk: initiative for initiative in cls.rank_round(room, record=record)}
+
+        from .roll_log import roll_log
+        rolled_at = timezone.now()
+        roll_log.extend([
+            RollRecord(
+                kind=RollRecord.KIND_INITIATIVE,
+                room_id=room.pk,
+                character_id=initiative.character_id,
+                initiative_round=initiative.initiative_round,
+                result=initiative.initiative_total,
+                detail=f"{initiative.initiative_roll}{initiative.initiative_bonus:+d}",
+                rolled_at=rolled_at,
+            )
+            for initiative in initiatives
+        ])
+
+        for initiative in initiatives:
+            if initiative.pk in ranked:
+                initiative.turn_order = ranked[initiative.pk].turn_order
+                initiative.current_turn = ranked[initiative.pk].current_turn
+        return initiatives
+
+    @classmethod
+    def rank_round(cls, room, record=True):
+        """
+        Grava a posição de cada iniciativa na fila da rodada atual.
+
+        Roda só quando a fila muda (rolagens); avançar turnos depois disso
+        usa apenas `turn_order` e `Room.initiative_count`. Se o estado da sala
+        muda, grava um evento KIND_RANK na mesma transação; `record=False` é
+        para quem grava o próprio evento cobrindo a mudança (start_initiative).
+        """
+        from rooms.event_store import record_event, room_state
+        from rooms.models import Room, RoomEvent, next_state_version
+
+        before = room_state(room)
+
+        queue = list(
+            room.get_initiative_queue().only('id', 'room_id', 'current_turn')
+        )
+
+        # Mantém o turno atual no mesmo combatente caso a fila mude no meio da rodada
+        current_index = next(
+            (index for index, initiative in enumerate(queue) if initiative.current_turn),
+            min(room.current_turn_index, max(len(queue) - 1, 0)),
+        )
+        for index, initiative in enumerate(queue):
+            initiative.turn_order = index
+            initiative.current_turn = index == current_index
+        room.initiative_count = len(queue)
+        room.current_turn_index = current_index
+        with transaction.atomic():
+            cls.objects.bulk_update(queue, ['turn_order', 'current_turn'])
+            Room.objects.filter(pk=room.pk).update(
+                initiative_count=room.initiative_count,
+                current_turn_index=room.current_turn_index,
+                state_version=next_state_version(),
+            )
+            room.expire_state_version()
+            if record and room_state(room) != before:
+                record_event(room, RoomEvent.KIND_RANK, before)
+        return queue
+
     @classmethod
     def roll_initiative_for_character(cls, room, character):
         """Rola iniciativa para um personagem em uma sala"""
-        initiative, created = cls.objects.get_or_create(
-            room=room,
-            character=character,
-            initiative_round=room.current_initiative_round,
-            defaults={
-                'initiative_roll': 0,
-                'initiative_bonus': character.get_initiative_modifier(),
-                'initiative_total': 0
-            }
-        )
-        initiative.roll_initiative()
+        from rooms.broadcast import broadcast_room_event, initiative_payload
+
+        initiative = cls.roll_for_characters(room, [character])[0]
+        broadcast_room_event(room.pk, 'initiative.rolled', initiative_payload(initiative))
         return initiative
 
     @classmethod
     def create_initiative_for_room(cls, room):
-        """Cria entradas de iniciativa para todos os personagens da sala"""
-        initiatives = []
-        for character in room.characters.all():
-            initiative = cls.roll_initiative_for_character(room, character)
-            initiatives.append(initiative)
-        return initiatives
+        """Cria entradas de iniciativa para todos os personagens e hordas da sala"""
+        characters, hordes = cls.room_combatants(room)
+        # O evento de início gravado por start_initiative já cobre a nova fila
+        return cls.roll_for_characters(room, characters, hordes, record=False)
+
+    class Meta:
+        ordering = ['sort_key']
+        unique_together = ['room', 'character', 'horde_group', 'initiative_round']
+        indexes = [
+            # A fila de uma rodada sai direto de um range scan neste índice
+            models.Index(fields=['room', 'initiative_round', 'sort_key'], name='initiative_queue_idx'),
+            # Paginação por keyset da API: (rodada, ordem do turno)
+            models.Index(fields=['room', 'initiative_round', 'turn_order'], name='initiative_turn_idx'),
+        ]
+
+
+class RollRecord(models.Model):
+    """
+    Histórico de rolagens (somente inserção).
+
+    As linhas chegam em lote pelo buffer de `initiative.roll_log`, nunca uma a
+    uma; `rolled_at` guarda o momento da rolagem, não o da gravação.
+    """
+    KIND_INITIATIVE = 1
+    KIND_ATTACK = 2
+    KIND_DAMAGE = 3
+    KIND_DICE = 4
+    KIND_CHOICES = (
+        (KIND_INITIATIVE, 'Iniciativa'),
+        (KIND_ATTACK, 'Ataque'),
+        (KIND_DAMAGE, 'Dano'),
+        (KIND_DICE, 'Dados'),
+    )
+
+    room = models.ForeignKey('rooms.Room', on_delete=models.CASCADE, related_name='roll_records', null=True, blank=True)
+    character = models.ForeignKey('characters.Character', on_delete=models.CASCADE, related_name='roll_records', null=True, blank=True)
+    initiative_round = models.IntegerField(null=True, blank=True)
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    result = models.IntegerField()
+    detail = models.CharField(max_length=50, blank=True)  # Ex.: '17+2' (d20 + bônus) ou a expressão rolada
+    rolled_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.result} ({self.detail})"
+
+    @classmethod
+    def history(cls, room=None, character=None, initiative_round=None):
+        """Histórico filtrado por sala, rodada e/ou personagem (mais recentes primeiro)"""
+        records = cls.objects.all()
+        if room is not None:
+            records = records.filter(room=room)
+        if character is not None:
+            records = records.filter(character=character)
+        if initiative_round is not None:
+            records = records.filter(initiative_round=initiative_round)
+        return records
+
+    class Meta:
+        ordering = ['-rolled_at', '-id']
+        indexes = [
+            models.Index(fields=['room', 'initiative_round', 'rolled_at'], name='rollrecord_room_idx'),
+            models.Index(fields=['character', 'rolled_at'], name='rollrecord_character_idx'),
+        ]
+
+
+
+class InitiativeRoundArchive(models.Model):
+    """
+    Resumo compacto de uma rodada encerrada.
+
+    As linhas de `Initiative` de rodadas antigas são movidas para cá (uma
+    linha por rodada) pelo comando `archive_initiative_rounds`, mantendo só a
+    rodada atual na tabela de iniciativa. Cada item de `entries` é uma lista
+    na ordem de `ENTRY_FIELDS`.
+    """
+    ENTRY_FIELDS = (
+        'character', 'character_name', 'initiative_roll', 'initiative_bonus',
+        'initiative_total', 'turn_order', 'completed', 'horde', 'horde_group',
+    )  # Entradas arquivadas antes das hordas não têm os dois últimos campos
+
+    room = models.ForeignKey('rooms.Room', on_delete=models.CASCADE, related_name='archived_rounds')
+    initiative_round = models.IntegerField()
+    entries = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Sala {self.room_id} - rodada {self.initiative_round} ({len(self.entries)} iniciativas)"
+
+    def get_entries(self):
+        """Entradas como dicionários, na ordem da fila"""
+        return [dict(zip(self.ENTRY_FIELDS, entry)) for entry in self.entries]
 
     class Meta:
-        ordering = ['-initiative_total', 'character__name']
-        unique_together = ['room', 'character', 'initiative_round']
\ No newline at end of file
+        ordering = ['-initiative_round']
+        unique_together = ['room', 'initiative_round']
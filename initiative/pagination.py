@@ -0,0 +1,100 @@
+# initiative/pagination.py
+from base64 import b64decode, b64encode
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class RollHistoryPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class ArchivedRoundPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class InitiativeKeysetPagination(BasePagination):
+    """
+    Paginação por keyset em (initiative_round, turn_order, id).
+
+    O cursor guarda a última chave da página; a próxima página é um range scan
+    em `initiative_turn_idx` a partir dela, sem OFFSET, não importa quantas
+    rodadas a sala já teve. Só avança (next).
+    """
+    ordering = ('initiative_round', 'turn_order', 'id')
+    cursor_query_param = 'cursor'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            initiative_round, turn_order, pk = position
+            queryset = queryset.filter(
+                Q(initiative_round__gt=initiative_round)
+                | Q(initiative_round=initiative_round, turn_order__gt=turn_order)
+                | Q(initiative_round=initiative_round, turn_order=turn_order, id__gt=pk)
+            )
+
+        # Um item a mais só para saber se existe próxima página
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            initiative_round, turn_order, pk = (
+                int(part) for part in b64decode(encoded.encode('ascii')).decode('ascii').split(',')
+            )
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Cursor inválido')
+        return initiative_round, turn_order, pk
+
+    def encode_cursor(self, initiative):
+        position = f'{initiative.initiative_round},{initiative.turn_order},{initiative.pk}'
+        return b64encode(position.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
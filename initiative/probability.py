@@ -0,0 +1,147 @@
+# initiative/probability.py
+"""
+Distribuição exata da ordem de iniciativa (sem simulação).
+
+Cada combatente rola d20 + modificador, uma distribuição uniforme em
+[mod + 1, mod + 20]. A diferença entre dois combatentes é a convolução de duas
+uniformes (triangular), o que dá exatamente P(A > B) e P(A == B); o empate é
+resolvido pela regra escolhida:
+
+- 'name': a mesma regra da fila (`Initiative.sort_key`), ordem alfabética;
+- 'modifier': maior modificador age antes; se igual, 50%;
+- 'random': 50%.
+
+Os resultados são guardados em cache por (modificadores na ordem de
+desempate, regra), então encontros repetidos não custam nada.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+TIE_BREAK_RULES = ('name', 'modifier', 'random')
+
+DIE_SIDES = 20
+_DIE = np.full(DIE_SIDES, 1 / DIE_SIDES)
+# Distribuição de U_a - U_b (dois d20): índice k corresponde à diferença k - 19
+_DIFFERENCE = np.convolve(_DIE, _DIE[::-1])
+# _AT_LEAST[k] = P(U_a - U_b >= k - 19)
+_AT_LEAST = np.append(_DIFFERENCE[::-1].cumsum()[::-1], 0.0)
+_OFFSET = DIE_SIDES - 1
+
+
+def _tie_wins(modifiers, tie_break):
+    """W[i, j] = probabilidade de i agir antes de j quando empatam"""
+    count = len(modifiers)
+    if tie_break == 'name':
+        # Os modificadores chegam em ordem alfabética dos nomes
+        return np.triu(np.ones((count, count)), k=1)
+    if tie_break == 'modifier':
+        delta = modifiers[:, None] - modifiers[None, :]
+        return np.where(delta > 0, 1.0, np.where(delta == 0, 0.5, 0.0))
+    return np.full((count, count), 0.5)
+
+
+@lru_cache(maxsize=256)
+def turn_order_tables(modifiers, tie_break='name'):
+    """
+    Calcula as tabelas de ordem para uma tupla de modificadores.
+
+    Retorna (acts_before, expected_position, first_probability), onde
+    acts_before[i, j] = P(i age antes de j). Os arrays são somente leitura
+    porque ficam no cache.
+    """
+    if tie_break not in TIE_BREAK_RULES:
+        raise ValueError(f'Regra de desempate inválida: {tie_break}')
+
+    mods = np.array(modifiers, dtype=np.int64)
+    count = len(mods)
+    delta = mods[:, None] - mods[None, :]
+
+    # P(T_i > T_j) = P(U_i - U_j >= 1 - delta) e P(T_i == T_j) = P(U_i - U_j == -delta)
+    greater = _AT_LEAST[np.clip(1 - delta + _OFFSET, 0, len(_AT_LEAST) - 1)]
+    equal_index = -delta + _OFFSET
+    in_range = (equal_index >= 0) & (equal_index < len(_DIFFERENCE))
+    equal = np.where(in_range, _DIFFERENCE[np.clip(equal_index, 0, len(_DIFFERENCE) - 1)], 0.0)
+
+    tie_wins = _tie_wins(mods, tie_break)
+    acts_before = greater + equal * tie_wins
+    np.fill_diagonal(acts_before, 0.0)
+
+    # Posição esperada (0 = primeiro): quantos agem antes de i, por linearidade
+    expected_position = acts_before.sum(axis=0)
+
+    # P(i primeiro | T_i = t): cada j contribui com P(T_j < t) + P(T_j == t) * W[i, j].
+    # Empates 50% viram um sorteio entre todos os empatados, então esses j entram
+    # como (P(T_j < t) + P(T_j == t) x) e a probabilidade é a integral em x de 0 a 1.
+    faces = np.arange(1, DIE_SIDES + 1)
+    needed = mods[:, None, None] + faces[None, None, :] - mods[None, :, None]   # (i, j, t)
+    below = np.clip(needed - 1, 0, DIE_SIDES) / DIE_SIDES                      # P(T_j < t)
+    same = ((needed >= 1) & (needed <= DIE_SIDES)) / DIE_SIDES                 # P(T_j == t)
+
+    lottery = tie_wins == 0.5
+    np.fill_diagonal(lottery, False)
+    constant = below + same * (tie_wins == 1.0)[:, :, None]
+    linear = same * lottery[:, :, None]
+    constant[np.arange(count), np.arange(count), :] = 1.0
+
+    # Polinômio em x por (i, t); o grau é o número de possíveis empates por sorteio
+    degree = int(lottery.sum(axis=1).max()) if count else 0
+    coefficients = np.zeros((count, DIE_SIDES, degree + 1))
+    coefficients[:, :, 0] = 1.0
+    for j in range(count):
+        shifted = coefficients[:, :, :-1] * linear[:, j, :, None]
+        coefficients *= constant[:, j, :, None]
+        coefficients[:, :, 1:] += shifted
+    first_given_total = (coefficients / np.arange(1, degree + 2)).sum(axis=2)
+    first_probability = first_given_total.sum(axis=1) / DIE_SIDES
+
+    for array in (acts_before, expected_position, first_probability):
+        array.flags.writeable = False
+    return acts_before, expected_position, first_probability
+
+
+def turn_order_odds(characters, tie_break='name', hordes=()):
+    """
+    Probabilidades exatas da ordem de iniciativa para uma lista de personagens
+    (e os grupos vivos de `hordes`, as mesmas entradas que a fila recebe).
+
+    Os combatentes são devolvidos na ordem canônica da regra de desempate
+    (alfabética para 'name', modificador decrescente para as demais), que é a
+    mesma ordem das linhas/colunas de `acts_before`.
+    """
+    from .models import Initiative
+
+    if tie_break not in TIE_BREAK_RULES:
+        raise ValueError(f'Regra de desempate inválida: {tie_break}')
+
+    combatants = [
+        (character.pk, horde.pk if horde else None, group, name, character.get_initiative_modifier())
+        for character, horde, group, name in Initiative.combatants(characters, hordes)
+    ]
+    if tie_break == 'name':
+        combatants.sort(key=lambda combatant: (combatant[3], combatant[0], combatant[2]))
+    else:
+        combatants.sort(key=lambda combatant: (-combatant[4], combatant[3], combatant[0], combatant[2]))
+
+    if not combatants:
+        return {'tie_break': tie_break, 'combatants': [], 'acts_before': []}
+
+    acts_before, expected_position, first_probability = turn_order_tables(
+        tuple(combatant[4] for combatant in combatants), tie_break
+    )
+    return {
+        'tie_break': tie_break,
+        'combatants': [
+            {
+                'id': pk,
+                'horde': horde_id,
+                'horde_group': group,
+                'name': name,
+                'initiative_modifier': modifier,
+                'expected_position': float(expected_position[index]),
+                'first_probability': float(first_probability[index]),
+            }
+            for index, (pk, horde_id, group, name, modifier) in enumerate(combatants)
+        ],
+        'acts_before': acts_before.tolist(),
+    }
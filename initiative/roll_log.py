@@ -0,0 +1,116 @@
+# initiative/roll_log.py
+"""
+Buffer de escrita adiada para o histórico de rolagens.
+
+As rolagens ficam em memória e são gravadas com um único `bulk_create` a cada
+ROLL_LOG_BATCH_SIZE rolagens ou ROLL_LOG_FLUSH_INTERVAL_MS milissegundos, o que
+vier primeiro. O que estiver pendente também é gravado ao encerrar o processo
+(atexit) e antes de qualquer consulta ao histórico feita pela API.
+
+Rolagens enfileiradas dentro de uma transação só entram no buffer depois do
+commit; se ela for desfeita, elas somem junto. Se o lote falhar ao ser gravado,
+as rolagens de salas/personagens que já não existem são descartadas e o resto é
+gravado de novo (ou volta para o buffer se o banco continuar falhando).
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class RollBuffer:
+    def __init__(self, batch_size, flush_interval_ms):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+        atexit.register(self.flush)
+
+    def extend(self, records):
+        """Enfileira várias rolagens (instâncias não salvas de RollRecord) após o commit da transação atual"""
+        records = list(records)
+        transaction.on_commit(lambda: self._enqueue(records))
+
+    def _enqueue(self, records):
+        with self._lock:
+            self._pending.extend(records)
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Grava tudo o que está pendente em um único bulk_create"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not pending:
+            return 0
+        try:
+            self._write(pending)
+        except DatabaseError:
+            logger.exception('Falha ao gravar %d rolagens; descartando as de registros apagados', len(pending))
+            pending = self._drop_dangling(pending)
+            try:
+                self._write(pending)
+            except DatabaseError:
+                logger.exception('Falha ao gravar %d rolagens; elas voltam para o buffer', len(pending))
+                with self._lock:
+                    self._pending[:0] = pending
+                return 0
+        return len(pending)
+
+    def _write(self, records):
+        from .models import RollRecord
+
+        # Em uma transação própria: as chaves estrangeiras são verificadas aqui, não depois
+        with transaction.atomic():
+            RollRecord.objects.bulk_create(records, batch_size=self.batch_size)
+
+    def _drop_dangling(self, records):
+        """Rolagens cuja sala e personagem ainda existem"""
+        from characters.models import Character
+        from rooms.models import Room
+
+        room_ids = set(Room.objects.filter(
+            pk__in={record.room_id for record in records if record.room_id}
+        ).values_list('pk', flat=True))
+        character_ids = set(Character.objects.filter(
+            pk__in={record.character_id for record in records if record.character_id}
+        ).values_list('pk', flat=True))
+        kept = [
+            record for record in records
+            if (record.room_id is None or record.room_id in room_ids)
+            and (record.character_id is None or record.character_id in character_ids)
+        ]
+        if len(kept) < len(records):
+            logger.warning('%d rolagens descartadas: sala ou personagem apagado', len(records) - len(kept))
+        return kept
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # A thread do timer abre a própria conexão; fecha para não vazar
+            connection.close()
+
+    def __len__(self):
+        return len(self._pending)
+
+
+roll_log = RollBuffer(
+    batch_size=getattr(settings, 'ROLL_LOG_BATCH_SIZE', 200),
+    flush_interval_ms=getattr(settings, 'ROLL_LOG_FLUSH_INTERVAL_MS', 1000),
+)
@@ -1,9 +1,10 @@
 from rest_framework import serializers
-from .models import Initiative
+from .models import Initiative, InitiativeRoundArchive, RollRecord
 from characters.serializers import CharacterSerializer
 
 class InitiativeSerializer(serializers.ModelSerializer):
-    character_name = serializers.ReadOnlyField(source='character.name')
+    # Nome do personagem ou do grupo da horda
+    character_name = serializers.ReadOnlyField(source='combatant_name')
     character_type = serializers.ReadOnlyField(source='character.character_type')
 
     class Meta:
@@ -20,4 +21,22 @@ class InitiativeRollSerializer(serializers.Serializer):
             Character.objects.get(id=value)
         except Character.DoesNotExist:
             raise serializers.ValidationError("Personagem não encontrado")
-        return value
\ No newline at end of file
+        return value
+
+class RollRecordSerializer(serializers.ModelSerializer):
+    kind_display = serializers.ReadOnlyField(source='get_kind_display')
+
+    class Meta:
+        model = RollRecord
+        fields = ('id', 'room', 'character', 'initiative_round', 'kind', 'kind_display', 'result', 'detail', 'rolled_at')
+
+
+class InitiativeRoundArchiveSerializer(serializers.ModelSerializer):
+    entries = serializers.SerializerMethodField()
+
+    class Meta:
+        model = InitiativeRoundArchive
+        fields = ('id', 'room', 'initiative_round', 'entries', 'archived_at')
+
+    def get_entries(self, obj):
+        return obj.get_entries()
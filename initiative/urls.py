@@ -1,7 +1,13 @@
 from django.urls import path
-from . import views
+from . import live, views
 
 urlpatterns = [
     path('room/<int:room_id>/', views.InitiativeListView.as_view(), name='initiative-list'),
     path('room/<int:room_id>/roll/', views.roll_initiative, name='roll-initiative'),
+    path('room/<int:room_id>/poll/', live.poll_initiative, name='initiative-poll'),
+    path('room/<int:room_id>/events/', live.stream_initiative, name='initiative-events'),
+    path('room/<int:room_id>/odds/', views.turn_order_odds, name='initiative-odds'),
+    path('room/<int:room_id>/history/', views.ArchivedRoundListView.as_view(), name='initiative-history'),
+    path('room/<int:room_id>/rolls/', views.RoomRollHistoryView.as_view(), name='room-roll-history'),
+    path('character/<int:character_id>/rolls/', views.CharacterRollHistoryView.as_view(), name='character-roll-history'),
 ]
\ No newline at end of file
@@ -1,17 +1,132 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from .models import Initiative
-from .serializers import InitiativeSerializer, InitiativeRollSerializer
+from rest_framework.exceptions import ValidationError
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from rooms.conditional import RoomVersionETagMixin
+from .models import Initiative, InitiativeRoundArchive, RollRecord
+from .pagination import ArchivedRoundPagination, InitiativeKeysetPagination, RollHistoryPagination
+from .roll_log import roll_log
+from .serializers import (
+    InitiativeSerializer, InitiativeRollSerializer, InitiativeRoundArchiveSerializer, RollRecordSerializer
+)
 
-class InitiativeListView(generics.ListAPIView):
+class InitiativeListView(RoomVersionETagMixin, generics.ListAPIView):
+    """
+    Iniciativas da sala, paginadas por keyset em (rodada, ordem do turno)
+    GET /api/v1/initiative/room/<room_id>/?round=current|N|A-B&page_size=100&cursor=...
+    """
     serializer_class = InitiativeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = InitiativeKeysetPagination
+    room_url_kwarg = 'room_id'
 
     def get_queryset(self):
-        room_id = self.kwargs['room_id']
+        from rooms.models import Room
+
         # Permitir acesso a mestres e jogadores da sala
-        return Initiative.objects.filter(room_id=room_id)
+        room = get_object_or_404(
+            Room.objects.visible_to(self.request.user).only('id', 'current_initiative_round'),
+            pk=self.kwargs['room_id'],
+        )
+        queryset = Initiative.objects.filter(room=room).select_related('character', 'horde')
+        return queryset.filter(**self.round_filter(room))
+
+    def round_filter(self, room):
+        """Filtro de `round`: 'current', um número ou um intervalo 'A-B'"""
+        value = self.request.query_params.get('round', '').strip()
+        if not value:
+            return {}
+        if value == 'current':
+            return {'initiative_round': room.current_initiative_round}
+
+        first, _, last = value.partition('-')
+        try:
+            first = int(first)
+            last = int(last) if last else None
+        except ValueError:
+            raise ValidationError({'round': "Use 'current', um número ou um intervalo 'A-B'."})
+        if last is None:
+            return {'initiative_round': first}
+        return {'initiative_round__range': (min(first, last), max(first, last))}
+
+class ArchivedRoundListView(generics.ListAPIView):
+    """
+    Rodadas arquivadas da sala (mais recentes primeiro)
+    GET /api/v1/initiative/room/<room_id>/history/
+    """
+    serializer_class = InitiativeRoundArchiveSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ArchivedRoundPagination
+
+    def get_queryset(self):
+        from rooms.models import Room
+
+        room = get_object_or_404(
+            Room.objects.visible_to(self.request.user),
+            pk=self.kwargs['room_id'],
+        )
+        return InitiativeRoundArchive.objects.filter(room=room)
+
+
+def _int_query_param(request, name):
+    """Lê um parâmetro inteiro opcional da query string (400 se inválido)"""
+    value = request.query_params.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Deve ser um número inteiro.'})
+
+
+class RoomRollHistoryView(generics.ListAPIView):
+    """
+    Histórico de rolagens da sala
+    GET /api/v1/initiative/room/<room_id>/rolls/?round=<n>&character=<id>
+    """
+    serializer_class = RollRecordSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = RollHistoryPagination
+
+    def get_queryset(self):
+        from rooms.models import Room
+
+        room = get_object_or_404(
+            Room.objects.visible_to(self.request.user),
+            pk=self.kwargs['room_id'],
+        )
+        # Garante que as rolagens ainda no buffer apareçam na consulta
+        roll_log.flush()
+        return RollRecord.history(
+            room=room,
+            character=_int_query_param(self.request, 'character'),
+            initiative_round=_int_query_param(self.request, 'round'),
+        )
+
+
+class CharacterRollHistoryView(generics.ListAPIView):
+    """
+    Histórico de rolagens de um personagem do usuário (ou de uma sala que ele mestra)
+    GET /api/v1/initiative/character/<character_id>/rolls/
+    """
+    serializer_class = RollRecordSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = RollHistoryPagination
+
+    def get_queryset(self):
+        from characters.models import Character
+
+        character = get_object_or_404(
+            Character.objects.filter(
+                Q(owner=self.request.user) | Q(rooms__master=self.request.user)
+            ).distinct(),
+            pk=self.kwargs['character_id'],
+        )
+        roll_log.flush()
+        return RollRecord.history(character=character)
+
 
 @api_view(['POST'])
 def roll_initiative(request, room_id):
@@ -36,4 +151,34 @@ def roll_initiative(request, room_id):
                 status=status.HTTP_404_NOT_FOUND
             )
     
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+def turn_order_odds(request, room_id):
+    """
+    Probabilidades exatas de ordem de iniciativa dos personagens e grupos de hordas da sala
+    GET /api/v1/initiative/room/<room_id>/odds/?tie_break=name|modifier|random
+    """
+    from rooms.models import Room
+    from .probability import TIE_BREAK_RULES, turn_order_odds as compute_odds
+
+    if not request.user.is_authenticated:
+        return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+    tie_break = request.query_params.get('tie_break', 'name')
+    if tie_break not in TIE_BREAK_RULES:
+        return Response(
+            {'error': f"tie_break deve ser um de: {', '.join(TIE_BREAK_RULES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        room = Room.objects.visible_to(request.user).get(id=room_id)
+    except Room.DoesNotExist:
+        return Response(
+            {'error': 'Sala não encontrada'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    characters, hordes = Initiative.room_combatants(room)
+    return Response(compute_odds(characters, tie_break, hordes))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Room
+from .models import Horde, Room, RoomMembership
 
 class CharacterInline(admin.TabularInline):
     model = Room.characters.through
@@ -18,7 +18,7 @@ class RoomAdmin(admin.ModelAdmin):
             'fields': ('name', 'code', 'description', 'story')
         }),
         ('Gerenciamento', {
-            'fields': ('master', 'players', 'initiative_started', 'current_initiative_round', 'current_turn_index')
+            'fields': ('master', 'players', 'initiative_started', 'current_initiative_round', 'current_turn_index', 'initiative_count')
         }),
         ('Status', {
             'fields': ('is_active',)
@@ -27,4 +27,19 @@ class RoomAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(RoomMembership)
+class RoomMembershipAdmin(admin.ModelAdmin):
+    list_display = ('user', 'room', 'role')
+    list_filter = ('role',)
+    search_fields = ('user__username', 'room__name', 'room__code')
+    readonly_fields = ('user', 'room', 'role')
+
+
+@admin.register(Horde)
+class HordeAdmin(admin.ModelAdmin):
+    list_display = ('name', 'room', 'template', 'alive_count', 'size', 'initiative_groups')
+    search_fields = ('name', 'room__name', 'template__name')
+    readonly_fields = ('alive_count', 'created_at', 'updated_at')
@@ -0,0 +1,43 @@
+# rooms/broadcast.py
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+def room_group_name(room_id):
+    """Nome do grupo do channel layer que reúne os clientes de uma sala"""
+    return f'room_{room_id}'
+
+
+def initiative_payload(initiative):
+    """Representação compacta de uma iniciativa para os eventos em tempo real"""
+    return {
+        'id': initiative.pk,
+        'character': initiative.character_id,
+        'character_name': initiative.combatant_name,
+        'horde': initiative.horde_id,
+        'horde_group': initiative.horde_group,
+        'initiative_roll': initiative.initiative_roll,
+        'initiative_bonus': initiative.initiative_bonus,
+        'initiative_total': initiative.initiative_total,
+        'initiative_round': initiative.initiative_round,
+        'turn_order': initiative.turn_order,
+        'current_turn': initiative.current_turn,
+    }
+
+
+def broadcast_room_event(room_id, event, data):
+    """
+    Envia um evento para todos os clientes conectados à sala.
+
+    O envio só acontece após o commit da transação corrente, para que nenhum
+    cliente receba um estado que ainda pode ser desfeito.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    message = {'type': 'room.event', 'event': event, 'data': data}
+    transaction.on_commit(
+        lambda: async_to_sync(channel_layer.group_send)(room_group_name(room_id), message)
+    )
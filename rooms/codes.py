@@ -0,0 +1,60 @@
+# rooms/codes.py
+"""
+Códigos de acesso das salas.
+
+Os códigos são gerados no servidor com um alfabeto sem caracteres ambíguos
+(sem 0/O, 1/I/L) e resolvidos para o id da sala através do cache, para que a
+entrada por código não precise ir ao banco a cada tentativa.
+"""
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+
+ROOM_CODE_ALPHABET = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+ROOM_CODE_LENGTH = 6
+# Candidatos verificados por consulta ao gerar um código novo
+CANDIDATES_PER_QUERY = 8
+
+
+def normalize_code(code):
+    return (code or '').strip().upper()
+
+
+def generate_room_code(queryset):
+    """Gera um código que ainda não existe em `queryset` (uma consulta por lote de candidatos)"""
+    while True:
+        candidates = {
+            ''.join(secrets.choice(ROOM_CODE_ALPHABET) for _ in range(ROOM_CODE_LENGTH))
+            for _ in range(CANDIDATES_PER_QUERY)
+        }
+        taken = set(queryset.filter(code__in=candidates).values_list('code', flat=True))
+        free = candidates - taken
+        if free:
+            return free.pop()
+
+
+def code_cache_key(code):
+    return f'room_code:{normalize_code(code)}'
+
+
+def resolve_code(code):
+    """Id da sala ativa com este código, ou None"""
+    from .models import Room
+
+    code = normalize_code(code)
+    if not code:
+        return None
+
+    key = code_cache_key(code)
+    room_id = cache.get(key)
+    if room_id is None:
+        room_id = Room.objects.filter(code=code, is_active=True).values_list('id', flat=True).first()
+        if room_id is not None:
+            cache.set(key, room_id, settings.ROOM_CODE_CACHE_TIMEOUT)
+    return room_id
+
+
+def forget_code(code):
+    if code:
+        cache.delete(code_cache_key(code))
@@ -0,0 +1,46 @@
+# rooms/conditional.py
+"""
+GET condicional (ETag / If-None-Match) baseado em `Room.state_version`.
+
+A versão é lida com uma única consulta pela chave primária; se o cliente já
+tem a representação atual, a resposta é 304 sem rodar as consultas da view
+nem serializar nada.
+"""
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Room
+
+
+def room_etag(room_id, version):
+    return f'"room-{room_id}-v{version}"'
+
+
+class RoomVersionETagMixin:
+    """Para views de leitura de uma sala; `room_url_kwarg` indica o kwarg com o id"""
+    room_url_kwarg = 'pk'
+
+    def get_room_version(self):
+        return (
+            Room.objects.visible_to(self.request.user)
+            .filter(pk=self.kwargs[self.room_url_kwarg])
+            .values_list('state_version', flat=True)
+            .first()
+        )
+
+    def get(self, request, *args, **kwargs):
+        version = self.get_room_version() if request.user.is_authenticated else None
+        if version is None:
+            # Sala inexistente ou sem acesso: segue o fluxo normal (404/403 da view)
+            return super().get(request, *args, **kwargs)
+
+        etag = room_etag(self.kwargs[self.room_url_kwarg], version)
+        client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in client_etags or '*' in client_etags:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
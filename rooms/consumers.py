@@ -0,0 +1,37 @@
+# rooms/consumers.py
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .broadcast import room_group_name
+from .models import RoomMembership
+
+
+class RoomConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Canal em tempo real de uma sala: mestre e jogadores recebem os eventos de
+    iniciativa (início de rodada, rolagens e troca de turno) sem fazer polling.
+    """
+
+    async def connect(self):
+        self.room_id = self.scope['url_route']['kwargs']['room_id']
+        self.group_name = room_group_name(self.room_id)
+        user = self.scope.get('user')
+
+        if user is None or not user.is_authenticated or not await self.is_member(user):
+            await self.close(code=4403)
+            return
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def room_event(self, message):
+        """Repassa ao cliente os eventos enviados por `broadcast_room_event`"""
+        await self.send_json({'event': message['event'], 'data': message['data']})
+
+    @database_sync_to_async
+    def is_member(self, user):
+        return RoomMembership.is_member(user, self.room_id)
@@ -0,0 +1,131 @@
+# rooms/event_store.py
+"""
+Event sourcing do estado de combate das salas.
+
+Cada transição (start_initiative, next_turn, reset_initiative e as mudanças
+da fila em Initiative.rank_round) grava um `RoomEvent` com o delta dos campos
+de estado. O primeiro evento de uma sala grava antes um `RoomSnapshot` (sequência
+0) com o estado completo de partida, e a cada SNAPSHOT_INTERVAL eventos outro
+snapshot guarda o estado completo. Reconstruir uma sala lê o último snapshot e
+aplica só os eventos posteriores; desfazer aplica o lado "antes" do último
+evento, sem recalcular nada a partir das tabelas (e para na última
+reordenação da fila, que não pode ser desfeita).
+"""
+from django.db import transaction
+from django.db.models import Case, Max, When
+
+# Campos de Room que formam o estado de combate (as flags das iniciativas derivam deles)
+STATE_FIELDS = ('initiative_started', 'current_initiative_round', 'current_turn_index', 'initiative_count')
+SNAPSHOT_INTERVAL = 50
+
+
+def room_state(room):
+    """Estado de combate atual (em memória) de uma sala"""
+    return {field: getattr(room, field) for field in STATE_FIELDS}
+
+
+def record_event(room, kind, before):
+    """
+    Grava a transição de `before` para o estado atual de `room`.
+
+    Deve rodar dentro da mesma transação que alterou a sala. `before` pode
+    trazer só os campos que mudaram; os demais são os do estado atual.
+    """
+    from .models import Room, RoomEvent, RoomSnapshot
+
+    after = room_state(room)
+    before = {**after, **before}
+    delta = {
+        field: [before[field], after[field]]
+        for field in before
+        if before[field] != after[field]
+    }
+    with transaction.atomic():
+        # A sala travada serializa a numeração dos eventos (Max + 1)
+        list(Room.objects.select_for_update().filter(pk=room.pk).values_list('pk', flat=True))
+        last = RoomEvent.objects.filter(room_id=room.pk).aggregate(last=Max('sequence'))['last']
+        if last is None:
+            # Primeiro evento: o estado de partida completo, base de toda reconstrução
+            RoomSnapshot.objects.create(room_id=room.pk, sequence=0, state=before)
+            last = 0
+        event = RoomEvent.objects.create(room_id=room.pk, sequence=last + 1, kind=kind, delta=delta)
+
+        if event.sequence % SNAPSHOT_INTERVAL == 0:
+            RoomSnapshot.objects.create(room_id=room.pk, sequence=event.sequence, state=after)
+    return event
+
+
+def rebuild_state(room_id):
+    """Estado reconstruído a partir do último snapshot + eventos seguintes: (estado, sequência)"""
+    from .models import Room, RoomEvent, RoomSnapshot
+
+    events = RoomEvent.objects.filter(room_id=room_id)
+    snapshot = RoomSnapshot.objects.filter(room_id=room_id).order_by('-sequence').first()
+    if snapshot is not None:
+        state, sequence = dict(snapshot.state), snapshot.sequence
+    else:
+        # Salas com eventos anteriores aos snapshots de partida: volta do estado
+        # gravado até antes do primeiro evento aplicando o lado "antes" de cada um
+        room = Room.objects.only(*STATE_FIELDS).get(pk=room_id)
+        state, sequence = room_state(room), 0
+        for event in events.order_by('-sequence'):
+            for field, (previous, _) in event.delta.items():
+                state[field] = previous
+
+    for event in events.filter(sequence__gt=sequence).order_by('sequence'):
+        for field, (_, value) in event.delta.items():
+            state[field] = value
+        sequence = event.sequence
+    return state, sequence
+
+
+def apply_state(room, state):
+    """Grava o estado na sala e deriva as flags das iniciativas da rodada"""
+    from .models import Room, next_state_version
+
+    for field in STATE_FIELDS:
+        setattr(room, field, state[field])
+
+    index = state['current_turn_index']
+    with transaction.atomic():
+        Room.objects.filter(pk=room.pk).update(
+            state_version=next_state_version(),
+            **{field: state[field] for field in STATE_FIELDS},
+        )
+        room.expire_state_version()
+        room.initiatives.filter(initiative_round=state['current_initiative_round']).update(
+            current_turn=Case(When(turn_order=index, then=True), default=False),
+            completed=Case(When(turn_order__lt=index, then=True), default=False),
+        )
+
+
+def undo_last_event(room):
+    """
+    Desfaz o último evento ainda não desfeito; retorna o evento de undo (ou None).
+
+    Eventos KIND_RANK são uma barreira: a fila reordenada vive nas linhas de
+    Initiative (`turn_order`), que o delta não guarda, então nem eles nem o que
+    veio antes deles podem ser desfeitos.
+    """
+    from .models import RoomEvent
+
+    with transaction.atomic():
+        event = (
+            RoomEvent.objects.select_for_update()
+            .filter(room_id=room.pk, reverted=False)
+            .exclude(kind=RoomEvent.KIND_UNDO)
+            .order_by('-sequence')
+            .first()
+        )
+        if event is None or event.kind == RoomEvent.KIND_RANK:
+            return None
+
+        before = room_state(room)
+        state = dict(before)
+        for field, (previous, _) in event.delta.items():
+            state[field] = previous
+        apply_state(room, state)
+
+        event.reverted = True
+        event.save(update_fields=['reverted'])
+        return record_event(room, RoomEvent.KIND_UNDO, before)
@@ -0,0 +1,20 @@
+# rooms/forms.py
+from django import forms
+
+from .codes import normalize_code
+from .models import Room
+
+
+class RoomForm(forms.ModelForm):
+    class Meta:
+        model = Room
+        fields = ['name', 'description', 'story', 'code', 'is_active']
+
+    def clean_code(self):
+        # Normalizado antes da verificação de unicidade do modelo (Room.save() grava em maiúsculas)
+        return normalize_code(self.cleaned_data.get('code'))
+
+
+class RoomCreateForm(RoomForm):
+    class Meta(RoomForm.Meta):
+        fields = ['name', 'description', 'story', 'code']
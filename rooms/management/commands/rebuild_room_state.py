@@ -0,0 +1,24 @@
+# rooms/management/commands/rebuild_room_state.py
+from django.core.management.base import BaseCommand
+
+from rooms.models import Room
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o estado de combate das salas a partir dos snapshots e eventos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_ids', nargs='*', type=int,
+                            help='Salas a reconstruir (padrão: todas com eventos)')
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.filter(events__isnull=False).distinct()
+        if options['room_ids']:
+            rooms = rooms.filter(pk__in=options['room_ids'])
+
+        for room in rooms:
+            state = room.rebuild_from_events()
+            self.stdout.write(
+                f"{room.name}: rodada {state['current_initiative_round']}, "
+                f"turno {state['current_turn_index']}"
+            )
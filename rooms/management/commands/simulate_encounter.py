@@ -0,0 +1,44 @@
+# rooms/management/commands/simulate_encounter.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rooms.models import Room
+
+
+class Command(BaseCommand):
+    help = 'Simula (Monte Carlo) o combate entre os PJs e os NPCs/monstros de uma sala'
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_id', type=int)
+        parser.add_argument('--trials', type=int, default=10000)
+        parser.add_argument('--workers', type=int, default=settings.ENCOUNTER_SIMULATION_WORKERS)
+        parser.add_argument('--max-rounds', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            room = Room.objects.get(pk=options['room_id'])
+        except Room.DoesNotExist:
+            raise CommandError(f"Sala {options['room_id']} não encontrada")
+
+        try:
+            report = room.simulate_encounter(
+                trials=options['trials'],
+                workers=options['workers'],
+                seed=options['seed'],
+                max_rounds=options['max_rounds'],
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f"Sala: {room.name} — {report['trials']} combates ({report['workers']} processos)")
+        self.stdout.write(f"Vitória dos jogadores: {report['players_win_probability']:.1%}")
+        self.stdout.write(f"Vitória dos monstros:  {report['monsters_win_probability']:.1%}")
+        self.stdout.write(f"Empates (limite de rodadas): {report['draw_probability']:.1%}")
+        if report['expected_rounds'] is not None:
+            self.stdout.write(f"Rodadas esperadas: {report['expected_rounds']:.2f}")
+        for combatant in report['combatants']:
+            self.stdout.write(
+                f"  {combatant['name']} ({combatant['side']}): "
+                f"sobrevive em {combatant['survival_probability']:.1%}"
+            )
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0002_room_initiative_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('kind', models.CharField(choices=[('start', 'Início de iniciativa'), ('next', 'Próximo turno'), ('reset', 'Reset de iniciativa'), ('undo', 'Desfazer')], max_length=10)),
+                ('delta', models.JSONField(default=dict)),
+                ('reverted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='rooms.room')),
+            ],
+            options={
+                'ordering': ['room', 'sequence'],
+                'unique_together': {('room', 'sequence')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('state', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='rooms.room')),
+            ],
+            options={
+                'ordering': ['room', '-sequence'],
+                'unique_together': {('room', 'sequence')},
+            },
+        ),
+    ]
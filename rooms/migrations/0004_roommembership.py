@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_memberships(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    RoomMembership = apps.get_model('rooms', 'RoomMembership')
+    memberships = [
+        RoomMembership(room_id=room_id, user_id=master_id, role='master')
+        for room_id, master_id in Room.objects.values_list('id', 'master_id')
+    ]
+    memberships += [
+        RoomMembership(room_id=room_id, user_id=user_id, role='player')
+        for room_id, user_id in Room.players.through.objects.values_list('room_id', 'customuser_id')
+    ]
+    RoomMembership.objects.bulk_create(memberships, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0003_roomevent_roomsnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('master', 'Mestre'), ('player', 'Jogador')], max_length=10)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='rooms.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'room', 'role')},
+            },
+        ),
+        migrations.RunPython(fill_memberships, migrations.RunPython.noop),
+    ]
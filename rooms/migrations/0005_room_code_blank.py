@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+from rooms.codes import generate_room_code, normalize_code
+
+
+def uppercase_codes(apps, schema_editor):
+    # Room.save() e a entrada por código trabalham com códigos em maiúsculas;
+    # um código que colide com outro depois de normalizado recebe um código novo
+    Room = apps.get_model('rooms', 'Room')
+    for room_id, code in Room.objects.order_by('pk').values_list('id', 'code'):
+        normalized = normalize_code(code)
+        if normalized == code:
+            continue
+        if not normalized or Room.objects.filter(code=normalized).exclude(pk=room_id).exists():
+            normalized = generate_room_code(Room.objects.all())
+        Room.objects.filter(pk=room_id).update(code=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0004_roommembership'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='room',
+            name='code',
+            field=models.CharField(blank=True, max_length=10, unique=True),
+        ),
+        migrations.RunPython(uppercase_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0005_room_code_blank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='state_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
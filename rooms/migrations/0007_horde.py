@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0006_mediablob'),
+        ('rooms', '0006_room_state_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Horde',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=90)),
+                ('size', models.PositiveIntegerField()),
+                ('hit_points', models.BinaryField()),
+                ('alive_count', models.PositiveIntegerField(default=0)),
+                ('initiative_groups', models.PositiveSmallIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hordes', to='rooms.room')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hordes', to='characters.character')),
+            ],
+            options={
+                'ordering': ['name'],
+                'unique_together': {('room', 'template')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0007_horde'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='roomevent',
+            name='kind',
+            field=models.CharField(choices=[('start', 'Início de iniciativa'), ('next', 'Próximo turno'), ('reset', 'Reset de iniciativa'), ('undo', 'Desfazer'), ('rank', 'Fila reordenada')], max_length=10),
+        ),
+    ]
@@ -1,11 +1,61 @@
-from django.db import models
+import numpy as np
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Prefetch, When
 from django.contrib.auth import get_user_model
 
+from .broadcast import broadcast_room_event, initiative_payload
+from .codes import generate_room_code, normalize_code
+from .event_store import apply_state, rebuild_state, record_event, room_state, undo_last_event
+
 User = get_user_model()
 
+
+def next_state_version():
+    return F('state_version') + 1
+
+
+class TurnConflictError(Exception):
+    """O turno da sala mudou antes deste avanço (outro avanço chegou primeiro)"""
+
+    def __init__(self, room):
+        self.room = room
+        super().__init__('O turno já foi avançado por outra requisição.')
+
+
+class RoomQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Salas em que o usuário é mestre ou jogador (consulta indexada em RoomMembership)"""
+        return self.filter(pk__in=RoomMembership.objects.filter(user=user).values('room_id'))
+
+    def with_api_relations(self):
+        """
+        Carrega em lote tudo o que o RoomSerializer usa: mestre, contagem de
+        jogadores, ids de jogadores/personagens e a fila da rodada atual com
+        seus personagens. O número de queries não depende de quantas salas há.
+        """
+        from characters.models import Character
+        from initiative.models import Initiative
+
+        current_queue = (
+            Initiative.objects
+            .filter(initiative_round=F('room__current_initiative_round'))
+            .select_related('character', 'horde')
+            .order_by('sort_key')
+        )
+        return (
+            self.select_related('master')
+            .annotate(player_count=Count('players', distinct=True))
+            .prefetch_related(
+                Prefetch('players', queryset=User.objects.only('id')),
+                Prefetch('characters', queryset=Character.objects.only('id')),
+                Prefetch('initiatives', queryset=current_queue, to_attr='current_initiatives'),
+            )
+        )
+
+
 class Room(models.Model):
     name = models.CharField(max_length=100)
-    code = models.CharField(max_length=10, unique=True)
+    code = models.CharField(max_length=10, unique=True, blank=True)  # Gerado em save() se vazio
     description = models.TextField(blank=True, null=True)
     story = models.TextField(blank=True, null=True)
     
@@ -18,99 +68,464 @@ class Room(models.Model):
     initiative_started = models.BooleanField(default=False)
     current_initiative_round = models.IntegerField(default=0)
     current_turn_index = models.IntegerField(default=0)
+    initiative_count = models.IntegerField(default=0)  # Tamanho da fila da rodada atual
+    # Incrementada a cada mudança visível da sala; base do ETag da API
+    state_version = models.PositiveIntegerField(default=0, editable=False)
     
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = RoomQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} (Code: {self.code})"
 
+    def save(self, *args, **kwargs):
+        self.code = normalize_code(self.code)
+        bump = not self._state.adding
+        if bump:
+            # Incremento atômico no banco; o valor novo é relido sob demanda
+            self.state_version = next_state_version()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'state_version'}
+        try:
+            if self.code:
+                return super().save(*args, **kwargs)
+
+            # Código gerado no servidor; se outra sala pegar o mesmo código entre a
+            # checagem e o INSERT, a restrição única falha e tentamos outro
+            while True:
+                self.code = generate_room_code(Room.objects.all())
+                try:
+                    with transaction.atomic():
+                        return super().save(*args, **kwargs)
+                except IntegrityError:
+                    if Room.objects.filter(code=self.code).exclude(pk=self.pk).exists():
+                        continue
+                    raise
+        finally:
+            if bump:
+                self.expire_state_version()
+
+    def expire_state_version(self):
+        """A versão foi incrementada no banco: descarta o valor em memória (relido ao acessar)"""
+        self.__dict__.pop('state_version', None)
+
+    @classmethod
+    def bump_state_version(cls, room_ids):
+        cls.objects.filter(pk__in=room_ids).update(state_version=next_state_version())
+
+    def join(self, user):
+        """Adiciona o usuário como jogador (idempotente); retorna True se ele entrou agora"""
+        with transaction.atomic():
+            if self.players.filter(pk=user.pk).exists():
+                return False
+            self.players.add(user)
+
+        broadcast_room_event(self.id, 'player.joined', {'user_id': user.pk, 'username': user.username})
+        return True
+
+    def spawn_characters(self, template, count, hit_points_variance=0, hit_points_roll=None):
+        """
+        Clona `template` `count` vezes dentro da sala ("Goblin 1", "Goblin 2", ...).
+
+        Os PV de cada cópia vêm de `hit_points_roll` (expressão de dados, ex.
+        '2d6', rolada de uma vez para todas) ou dos PV do modelo ± uma variação
+        uniforme de até `hit_points_variance`. Personagens e vínculos com a sala
+        são gravados com bulk_create em uma transação; como isso não dispara
+        signals, a versão da sala e as referências dos blobs (imagem/modelo 3D
+        compartilhados) são atualizadas aqui. Retorna os personagens criados.
+        """
+        import re
+
+        from characters.models import Character, MediaBlob
+
+        hit_points = template.roll_hit_points(count, hit_points_variance, hit_points_roll).tolist()
+
+        copied_fields = [
+            field.attname for field in Character._meta.concrete_fields
+            if not field.primary_key and field.attname not in ('name', 'hit_points', 'created_at', 'updated_at')
+        ]
+        max_length = Character._meta.get_field('name').max_length
+
+        with transaction.atomic():
+            # Continua a numeração das cópias que já estão na sala (com espaço para o sufixo)
+            base_name = template.name[:max_length - 8].rstrip()
+            pattern = re.compile(rf'^{re.escape(base_name)} (\d+)$')
+            numbers = [
+                int(match.group(1))
+                for match in map(pattern.match, self.characters.filter(
+                    name__startswith=f'{base_name} '
+                ).values_list('name', flat=True))
+                if match
+            ]
+            first = max(numbers, default=0) + 1
+
+            clones = Character.objects.bulk_create([
+                Character(
+                    name=f'{base_name} {first + index}',
+                    hit_points=hit_points[index],
+                    **{attname: getattr(template, attname) for attname in copied_fields},
+                )
+                for index in range(count)
+            ])
+            RoomCharacter = Room.characters.through
+            RoomCharacter.objects.bulk_create([
+                RoomCharacter(room_id=self.pk, character_id=clone.pk) for clone in clones
+            ])
+            Room.bump_state_version([self.pk])
+            MediaBlob.acquire([template.image.name, template.model_3d.name] * count)
+
+        broadcast_room_event(self.id, 'characters.spawned', {
+            'template_id': template.pk,
+            'character_ids': [clone.pk for clone in clones],
+        })
+        return clones
+
     def get_initiative_queue(self):
-        """Retorna a fila de iniciativa ordenada para esta sala"""
+        """Retorna a fila de iniciativa ordenada"""
         return self.initiatives.filter(
             initiative_round=self.current_initiative_round
-        ).order_by('-initiative_total', 'character__name')
+        ).order_by('sort_key')
     
     def get_current_turn(self):
         """Retorna a iniciativa do turno atual"""
-        queue = self.get_initiative_queue()
-        if queue.exists() and self.current_turn_index < queue.count():
-            return queue[self.current_turn_index]
-        return None
-    
-    def next_turn(self):
-        """Avança para o próximo turno"""
-        queue = self.get_initiative_queue()
-        if queue.exists():
-            self.current_turn_index = (self.current_turn_index + 1) % queue.count()
-            self.save()
-            return self.get_current_turn()
-        return None
+        if self.current_turn_index >= self.initiative_count:
+            return None
+        return self.initiatives.filter(
+            initiative_round=self.current_initiative_round,
+            turn_order=self.current_turn_index,
+        ).select_related('character', 'horde').first()
     
+    def next_turn(self, expected_turn=None):
+        """
+        Avança para o próximo turno.
+
+        A transição é um compare-and-set: o UPDATE da sala só acontece se a
+        rodada e o turno no banco ainda forem os que este avanço espera
+        (`expected_turn`, ou o turno carregado em memória). Dois cliques ou
+        dois mestres avançando juntos resultam em um avanço e um
+        TurnConflictError, nunca em turno pulado/repetido. Só as colunas do
+        turno são escritas; a ordem da fila já está em `Initiative.turn_order`.
+        """
+        if not self.initiative_count:
+            return None
+
+        previous_index = self.current_turn_index if expected_turn is None else expected_turn
+        new_index = (previous_index + 1) % self.initiative_count
+
+        with transaction.atomic():
+            advanced = Room.objects.filter(
+                pk=self.pk,
+                current_initiative_round=self.current_initiative_round,
+                current_turn_index=previous_index,
+            ).update(current_turn_index=new_index, state_version=next_state_version())
+            if not advanced:
+                self.refresh_from_db(fields=['current_initiative_round', 'current_turn_index', 'initiative_count'])
+                raise TurnConflictError(self)
+
+            # Marca turno atual como completo e o novo como turno atual
+            self.initiatives.filter(
+                initiative_round=self.current_initiative_round,
+                turn_order__in=[previous_index, new_index],
+            ).update(
+                current_turn=Case(When(turn_order=new_index, then=True), default=False),
+                completed=Case(When(turn_order=new_index, then=False), default=True),
+            )
+            self.current_turn_index = new_index
+            self.expire_state_version()
+            record_event(self, RoomEvent.KIND_NEXT, {'current_turn_index': previous_index})
+
+        current = self.get_current_turn()
+
+        broadcast_room_event(self.pk, 'turn.changed', {
+            'initiative_round': self.current_initiative_round,
+            'current_turn_index': self.current_turn_index,
+            'current': initiative_payload(current) if current else None,
+        })
+        return current
+
     def reset_initiative(self):
         """Reseta a iniciativa para nova rodada"""
-        self.initiative_started = False
-        self.current_initiative_round += 1
-        self.current_turn_index = 0
-        self.save()
+        before = room_state(self)
+        with transaction.atomic():
+            self.initiative_started = False
+            self.current_turn_index = 0
+            self.save(update_fields=['initiative_started', 'current_turn_index', 'updated_at'])
+            record_event(self, RoomEvent.KIND_RESET, before)
 
     def start_initiative(self):
         """Inicia uma nova rodada de iniciativa"""
         from initiative.models import Initiative
         
-        self.initiative_started = True
-        self.current_initiative_round += 1
-        self.current_turn_index = 0
-        self.save()
-        
-        # Rola iniciativa para todos os personagens
-        Initiative.create_initiative_for_room(self)
-        return self.get_initiative_queue()
+        before = room_state(self)
+        with transaction.atomic():
+            self.initiative_started = True
+            self.current_initiative_round += 1
+            self.current_turn_index = 0
+            self.save(update_fields=[
+                'initiative_started', 'current_initiative_round', 'current_turn_index', 'updated_at',
+            ])
 
-    def get_initiative_queue(self):
-        """Retorna a fila de iniciativa ordenada"""
-        return self.initiatives.filter(
-            initiative_round=self.current_initiative_round
-        ).order_by('-initiative_total', 'character__name')
-    
-    def get_current_turn(self):
-        """Retorna a iniciativa do turno atual"""
-        queue = list(self.get_initiative_queue())
-        if queue and self.current_turn_index < len(queue):
-            return queue[self.current_turn_index]
-        return None
-    
-    def next_turn(self):
-        """Avança para o próximo turno"""
-        queue = list(self.get_initiative_queue())
-        if queue:
-            # Marca turno atual como completo
-            current = self.get_current_turn()
-            if current:
-                current.completed = True
-                current.current_turn = False
-                current.save()
-            
-            # Avança para próximo turno
-            self.current_turn_index = (self.current_turn_index + 1) % len(queue)
-            self.save()
-            
-            # Marca novo turno atual
-            new_current = self.get_current_turn()
-            if new_current:
-                new_current.current_turn = True
-                new_current.completed = False
-                new_current.save()
-            
-            return new_current
-        return None
+            # Rola iniciativa para todos os personagens
+            Initiative.create_initiative_for_room(self)
+            record_event(self, RoomEvent.KIND_START, before)
 
-    def reset_initiative(self):
-        """Reseta a iniciativa para nova rodada"""
-        self.initiative_started = False
-        self.current_turn_index = 0
-        self.save()
+        queue = self.get_initiative_queue().select_related('character', 'horde')
+
+        broadcast_room_event(self.pk, 'initiative.started', {
+            'initiative_round': self.current_initiative_round,
+            'current_turn_index': self.current_turn_index,
+            'queue': [initiative_payload(initiative) for initiative in queue],
+        })
+        return queue
+
+    def undo_last_action(self):
+        """Desfaz a última transição de estado (início, turno ou reset); retorna o evento de undo"""
+        event = undo_last_event(self)
+        if event is not None:
+            broadcast_room_event(self.pk, 'state.restored', room_state(self))
+        return event
+
+    def rebuild_from_events(self):
+        """Reconstrói o estado de combate a partir do último snapshot + eventos seguintes"""
+        state, _ = rebuild_state(self.pk)
+        apply_state(self, state)
+        return state
+
+    def simulate_encounter(self, trials=10000, workers=1, seed=None, max_rounds=None, max_size=None):
+        """Estima o resultado do combate entre os PJs e os NPCs/monstros da sala (Monte Carlo)"""
+        from .simulation import DEFAULT_MAX_ROUNDS, build_combatants, simulate
+
+        combatants = build_combatants(self.characters.all(), self.hordes.select_related('template'))
+        return simulate(
+            combatants, trials=trials, workers=workers, seed=seed,
+            max_rounds=max_rounds or DEFAULT_MAX_ROUNDS, max_size=max_size,
+        )
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class RoomEvent(models.Model):
+    """
+    Fluxo ordenado das transições de estado de combate de uma sala.
+
+    `delta` guarda, para cada campo de estado alterado, o par [antes, depois],
+    então desfazer é aplicar os valores "antes" e reconstruir é aplicar os
+    valores "depois" a partir do último snapshot.
+    """
+    KIND_START = 'start'
+    KIND_NEXT = 'next'
+    KIND_RESET = 'reset'
+    KIND_UNDO = 'undo'
+    KIND_RANK = 'rank'
+    KIND_CHOICES = (
+        (KIND_START, 'Início de iniciativa'),
+        (KIND_NEXT, 'Próximo turno'),
+        (KIND_RESET, 'Reset de iniciativa'),
+        (KIND_UNDO, 'Desfazer'),
+        (KIND_RANK, 'Fila reordenada'),
+    )
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='events')
+    sequence = models.PositiveIntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    delta = models.JSONField(default=dict)
+    reverted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Sala {self.room_id} #{self.sequence}: {self.get_kind_display()}"
+
+    class Meta:
+        ordering = ['room', 'sequence']
+        unique_together = ['room', 'sequence']
+
+
+class RoomSnapshot(models.Model):
+    """Estado completo de combate de uma sala após o evento `sequence`"""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='snapshots')
+    sequence = models.PositiveIntegerField()
+    state = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Sala {self.room_id} snapshot #{self.sequence}"
+
+    class Meta:
+        ordering = ['room', '-sequence']
+        unique_together = ['room', 'sequence']
+
+
+class RoomMembership(models.Model):
+    """
+    Índice usuário -> sala com o papel do usuário.
+
+    Mantido pelos sinais de rooms/signals.py (mudança de `Room.master` e do M2M
+    `Room.players`); nunca deve ser editado à mão.
+    """
+    ROLE_MASTER = 'master'
+    ROLE_PLAYER = 'player'
+    ROLE_CHOICES = (
+        (ROLE_MASTER, 'Mestre'),
+        (ROLE_PLAYER, 'Jogador'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='room_memberships')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='memberships')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+
+    def __str__(self):
+        return f"{self.user} em {self.room_id} ({self.get_role_display()})"
+
+    @classmethod
+    def is_member(cls, user, room_id):
+        return cls.objects.filter(user=user, room_id=room_id).exists()
+
+    class Meta:
+        unique_together = ['user', 'room', 'role']
+
+
+class Horde(models.Model):
+    """
+    Grupo de criaturas idênticas (ex.: 300 esqueletos) em uma única linha.
+
+    Tudo o que é igual entre as criaturas vem do personagem `template`; cada
+    criatura guarda só os PV atuais, em um array int16 compacto (`hit_points`,
+    2 bytes por criatura). Criatura com 0 PV está morta. Na iniciativa a horda
+    entra como `initiative_groups` entradas, cada uma com uma fatia das criaturas.
+    """
+    HIT_POINTS_DTYPE = np.dtype('<i2')
+    MAX_HIT_POINTS = np.iinfo(HIT_POINTS_DTYPE).max
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='hordes')
+    template = models.ForeignKey('characters.Character', on_delete=models.CASCADE, related_name='hordes')
+    # Curto o bastante para caber na chave de ordenação da fila com o sufixo do grupo
+    name = models.CharField(max_length=90)
+    size = models.PositiveIntegerField()
+    hit_points = models.BinaryField()
+    alive_count = models.PositiveIntegerField(default=0)
+    initiative_groups = models.PositiveSmallIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.alive_count}/{self.size})"
+
+    @classmethod
+    def create_for_room(cls, room, template, size, name=None, initiative_groups=1,
+                        hit_points_variance=0, hit_points_roll=None):
+        """Cria a horda com os PV de cada criatura já rolados"""
+        horde = cls(
+            room=room,
+            template=template,
+            name=(name or template.name)[:cls._meta.get_field('name').max_length],
+            size=size,
+            initiative_groups=min(initiative_groups, size),
+        )
+        horde.set_hit_points(template.roll_hit_points(size, hit_points_variance, hit_points_roll))
+        with transaction.atomic():
+            horde.save()
+            Room.bump_state_version([room.pk])
+            if room.initiative_started:
+                # Combate em andamento: os grupos entram na fila da rodada atual
+                from initiative.models import Initiative
+                Initiative.roll_for_characters(room, [], [horde])
+
+        broadcast_room_event(room.pk, 'horde.created', {'horde': horde.pk, 'name': horde.name, 'size': size})
+        return horde
+
+    def remove(self):
+        """Apaga a horda (e suas entradas na fila) e reordena a rodada atual"""
+        from initiative.models import Initiative
+
+        room = self.room
+        with transaction.atomic():
+            self.delete()
+            if room.initiative_started:
+                Initiative.rank_round(room)
+            else:
+                Room.bump_state_version([room.pk])
+
+    def get_hit_points(self):
+        """PV atuais de cada criatura (cópia gravável, int64)"""
+        return np.frombuffer(bytes(self.hit_points), dtype=self.HIT_POINTS_DTYPE).astype(np.int64)
+
+    def set_hit_points(self, values):
+        values = np.clip(values, 0, self.MAX_HIT_POINTS).astype(self.HIT_POINTS_DTYPE)
+        self.hit_points = values.tobytes()
+        self.alive_count = int(np.count_nonzero(values))
+
+    def group_indices(self):
+        """Índices das criaturas de cada grupo de iniciativa (fatias contíguas)"""
+        return np.array_split(np.arange(self.size), self.initiative_groups)
+
+    def group_label(self, group):
+        """Nome do grupo na fila; `group` começa em 1"""
+        return self.format_group_label(self.name, group, self.initiative_groups)
+
+    @staticmethod
+    def format_group_label(name, group, initiative_groups):
+        if initiative_groups == 1:
+            return name
+        return f"{name} ({group}/{initiative_groups})"
+
+    def living_groups(self):
+        """Números (a partir de 1) dos grupos com alguma criatura viva"""
+        alive = self.get_hit_points() > 0
+        return [group for group, indices in enumerate(self.group_indices(), start=1) if alive[indices].any()]
+
+    def apply_damage(self, amount, instances=None):
+        """
+        Tira `amount` PV (negativo cura) das criaturas em `instances`, ou de
+        todas as vivas. Lê e grava o array com a linha travada, então danos
+        simultâneos não se perdem. Levanta IndexError para índices inválidos.
+
+        Com a iniciativa em andamento, grupos que morrem saem da fila da rodada
+        atual e grupos revividos por cura entram com uma rolagem nova.
+        """
+        from initiative.models import Initiative
+
+        with transaction.atomic():
+            locked = Horde.objects.select_for_update().get(pk=self.pk)
+            living_before = set(locked.living_groups())
+            hit_points = locked.get_hit_points()
+            if instances is None:
+                targets = np.flatnonzero(hit_points > 0)
+            else:
+                targets = np.asarray(instances, dtype=np.int64)
+                if targets.size and (targets.min() < 0 or targets.max() >= locked.size):
+                    raise IndexError('Criatura fora da horda.')
+            hit_points[targets] = np.maximum(hit_points[targets] - amount, 0)
+
+            self.set_hit_points(hit_points)
+            self.save(update_fields=['hit_points', 'alive_count', 'updated_at'])
+
+            room = Room.objects.get(pk=self.room_id)
+            living = set(self.living_groups())
+            if room.initiative_started and living != living_before:
+                Initiative.objects.filter(
+                    horde=self,
+                    horde_group__in=living_before - living,
+                    initiative_round=room.current_initiative_round,
+                ).delete()
+                # Reordena a rodada (e grava o evento) mesmo se só houve mortes
+                Initiative.roll_combatants(room, [
+                    (self.template, self, group, self.group_label(group)) for group in sorted(living - living_before)
+                ])
+            else:
+                Room.bump_state_version([self.room_id])
+
+        broadcast_room_event(self.room_id, 'horde.updated', {
+            'horde': self.pk,
+            'alive_count': self.alive_count,
+            'hit_points': self.get_hit_points().tolist(),
+        })
+        return self
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['name']
+        # Uma horda por modelo na sala (a fila usa personagem + grupo como chave); aumente `size`
+        unique_together = ['room', 'template']
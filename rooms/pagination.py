@@ -0,0 +1,20 @@
+# rooms/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class PickerPagination(CursorPagination):
+    """
+    Paginação por cursor dos seletores da sala: segue o índice da ordenação em
+    vez de OFFSET/COUNT, então o custo não cresce com o total de usuários.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+
+class AvailablePlayerPagination(PickerPagination):
+    ordering = 'username'
+
+
+class AvailableCharacterPagination(PickerPagination):
+    ordering = ('name', 'id')
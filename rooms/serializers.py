@@ -1,32 +1,126 @@
 from rest_framework import serializers
-from .models import Room
+from .codes import normalize_code
+from .models import Horde, Room
 from characters.serializers import CharacterSerializer
 
-class RoomSerializer(serializers.ModelSerializer):
+class RoomCodeMixin:
+    def validate_code(self, value):
+        # Room.save() grava o código em maiúsculas; a unicidade é verificada no valor normalizado
+        code = normalize_code(value)
+        others = Room.objects.filter(code=code)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if code and others.exists():
+            raise serializers.ValidationError('Já existe uma sala com este código.')
+        return code
+
+class RoomSerializer(RoomCodeMixin, serializers.ModelSerializer):
     master_name = serializers.ReadOnlyField(source='master.username')
-    player_count = serializers.ReadOnlyField()
+    player_count = serializers.SerializerMethodField()
     initiative_queue = serializers.SerializerMethodField()
 
     class Meta:
         model = Room
         fields = '__all__'
-        read_only_fields = ('master', 'created_at', 'updated_at')
+        # initiative_count e state_version são desnormalizados e mantidos pelo servidor
+        read_only_fields = ('master', 'created_at', 'updated_at', 'initiative_count', 'state_version')
 
     def get_player_count(self, obj):
+        # Anotado por Room.objects.with_api_relations(); conta só se não vier anotado
+        if hasattr(obj, 'player_count'):
+            return obj.player_count
         return obj.players.count()
 
     def get_initiative_queue(self, obj):
         if obj.initiative_started:
-            queue = obj.get_initiative_queue()
+            # Pré-carregado por with_api_relations(); senão busca a fila com os personagens
+            queue = getattr(obj, 'current_initiatives', None)
+            if queue is None:
+                queue = obj.get_initiative_queue().select_related('character', 'horde')
             from initiative.serializers import InitiativeSerializer
             return InitiativeSerializer(queue, many=True).data
         return []
 
-class RoomCreateSerializer(serializers.ModelSerializer):
+class RoomCreateSerializer(RoomCodeMixin, serializers.ModelSerializer):
     class Meta:
         model = Room
-        fields = ('name', 'description', 'story')
+        fields = ('id', 'name', 'description', 'story', 'code')
+        read_only_fields = ('id',)
 
     def create(self, validated_data):
         validated_data['master'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class EncounterSimulationSerializer(serializers.Serializer):
+    trials = serializers.IntegerField(min_value=1, max_value=100000, default=10000)
+    max_rounds = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+    seed = serializers.IntegerField(min_value=0, required=False)
+
+class AvailablePlayerSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+
+class AvailableCharacterSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    character_type = serializers.CharField()
+    character_type_display = serializers.CharField(source='get_character_type_display')
+    owner_username = serializers.CharField(source='owner.username')
+
+class JoinRoomSerializer(serializers.Serializer):
+    code = serializers.CharField(max_length=10)
+
+class NextTurnSerializer(serializers.Serializer):
+    # Turno que o cliente está vendo; se o servidor já estiver em outro, o avanço é recusado (409)
+    expected_turn = serializers.IntegerField(min_value=0, required=False)
+
+class HitPointsOptionsSerializer(serializers.Serializer):
+    # PV de cada cópia: modelo ± variação, ou uma expressão de dados rolada por cópia
+    hit_points_variance = serializers.IntegerField(min_value=0, max_value=1000, default=0)
+    hit_points_roll = serializers.CharField(max_length=50, required=False)
+
+    def validate_hit_points_roll(self, value):
+        from characters.dice import DiceExpressionError, parse
+
+        try:
+            parse(value)
+        except DiceExpressionError as error:
+            raise serializers.ValidationError(str(error))
+        return value
+
+    def validate(self, attrs):
+        if attrs.get('hit_points_roll') and attrs.get('hit_points_variance'):
+            raise serializers.ValidationError('Use hit_points_variance ou hit_points_roll, não os dois.')
+        return attrs
+
+class SpawnCharactersSerializer(HitPointsOptionsSerializer):
+    template_id = serializers.IntegerField()
+    count = serializers.IntegerField(min_value=1, max_value=200)
+
+class HordeCreateSerializer(HitPointsOptionsSerializer):
+    template_id = serializers.IntegerField()
+    size = serializers.IntegerField(min_value=1, max_value=5000)
+    name = serializers.CharField(max_length=90, required=False)
+    initiative_groups = serializers.IntegerField(min_value=1, max_value=20, default=1)
+
+class HordeSerializer(serializers.ModelSerializer):
+    template_name = serializers.ReadOnlyField(source='template.name')
+    hit_points = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Horde
+        fields = (
+            'id', 'room', 'template', 'template_name', 'name', 'size', 'alive_count',
+            'initiative_groups', 'hit_points', 'created_at', 'updated_at',
+        )
+        read_only_fields = fields
+
+    def get_hit_points(self, obj):
+        # O array inteiro sai de uma vez, sem uma linha por criatura
+        return obj.get_hit_points().tolist()
+
+class HordeDamageSerializer(serializers.Serializer):
+    # Negativo cura; sem `instances` atinge todas as criaturas vivas
+    amount = serializers.IntegerField(min_value=-10000, max_value=10000)
+    instances = serializers.ListField(child=serializers.IntegerField(min_value=0), required=False, max_length=5000)
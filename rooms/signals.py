@@ -0,0 +1,117 @@
+# rooms/signals.py
+"""
+Mantém a tabela RoomMembership sincronizada com `Room.master` e `Room.players`,
+invalida o cache de códigos de acesso (rooms/codes.py) e incrementa
+`Room.state_version` quando o que as salas mostram muda.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from characters.models import Character
+from .codes import forget_code
+from .models import Room, RoomMembership
+
+PLAYER = RoomMembership.ROLE_PLAYER
+MASTER = RoomMembership.ROLE_MASTER
+# Campos do personagem que aparecem na sala e na fila de iniciativa
+ROOM_CHARACTER_FIELDS = ('name', 'character_type')
+
+
+def loaded_value(instance, field):
+    # Lê direto do __dict__ para não disparar a carga de campos adiados (.only()/.defer())
+    return instance.__dict__.get(field)
+
+
+@receiver(post_init, sender=Room)
+def remember_master(sender, instance, **kwargs):
+    # Guarda o mestre e o código carregados para só agir quando eles mudarem
+    instance._membership_master_id = loaded_value(instance, 'master_id')
+    instance._loaded_code = loaded_value(instance, 'code')
+
+
+@receiver(post_save, sender=Room)
+def invalidate_code_cache(sender, instance, created, update_fields=None, **kwargs):
+    # Código trocado ou sala desativada: o cache não pode mais resolver o código antigo
+    code = loaded_value(instance, 'code')
+    if code is None or (update_fields is not None and not {'code', 'is_active'} & set(update_fields)):
+        return
+    if not created and (instance._loaded_code != code or not loaded_value(instance, 'is_active')):
+        forget_code(instance._loaded_code)
+    instance._loaded_code = code
+
+
+@receiver(post_delete, sender=Room)
+def forget_deleted_room_code(sender, instance, **kwargs):
+    forget_code(instance.code)
+
+
+@receiver(post_save, sender=Room)
+def sync_master_membership(sender, instance, created, raw=False, **kwargs):
+    master_id = loaded_value(instance, 'master_id')
+    if raw or master_id is None or (not created and master_id == instance._membership_master_id):
+        return
+
+    RoomMembership.objects.filter(room=instance, role=MASTER).exclude(user_id=master_id).delete()
+    RoomMembership.objects.bulk_create(
+        [RoomMembership(room=instance, user_id=master_id, role=MASTER)],
+        ignore_conflicts=True,
+    )
+    instance._membership_master_id = master_id
+
+
+@receiver(m2m_changed, sender=Room.players.through)
+@receiver(m2m_changed, sender=Room.characters.through)
+def bump_room_version(sender, instance, action, reverse, pk_set, **kwargs):
+    """Jogadores ou personagens mudaram: a representação da sala mudou (ETag)"""
+    if not reverse:
+        if action == 'post_clear' or (action in ('post_add', 'post_remove') and pk_set):
+            Room.bump_state_version([instance.pk])
+    elif action == 'pre_clear':
+        # user.joined_rooms.clear() / character.rooms.clear(): depois não há como saber as salas
+        related = instance.rooms if sender is Room.characters.through else instance.joined_rooms
+        instance._cleared_room_ids = list(related.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        Room.bump_state_version(instance.__dict__.pop('_cleared_room_ids', []))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        Room.bump_state_version(pk_set)
+
+
+@receiver(m2m_changed, sender=Room.players.through)
+def sync_player_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    """Funciona nos dois sentidos: room.players.add(...) e user.joined_rooms.add(...)"""
+    if action == 'post_add' and pk_set:
+        if reverse:
+            memberships = [RoomMembership(user=instance, room_id=pk, role=PLAYER) for pk in pk_set]
+        else:
+            memberships = [RoomMembership(room=instance, user_id=pk, role=PLAYER) for pk in pk_set]
+        RoomMembership.objects.bulk_create(memberships, ignore_conflicts=True)
+
+    elif action == 'post_remove' and pk_set:
+        lookup = {'user': instance, 'room_id__in': pk_set} if reverse else {'room': instance, 'user_id__in': pk_set}
+        RoomMembership.objects.filter(role=PLAYER, **lookup).delete()
+
+    elif action == 'post_clear':
+        lookup = {'user': instance} if reverse else {'room': instance}
+        RoomMembership.objects.filter(role=PLAYER, **lookup).delete()
+
+
+@receiver(post_init, sender=Character)
+def remember_room_fields(sender, instance, **kwargs):
+    instance._loaded_room_fields = {field: loaded_value(instance, field) for field in ROOM_CHARACTER_FIELDS}
+
+
+@receiver(post_save, sender=Character)
+def bump_character_rooms(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Nome ou tipo do personagem mudou: as salas e filas em que ele aparece mudaram (ETag)"""
+    from initiative.models import Initiative
+
+    fields = ROOM_CHARACTER_FIELDS if update_fields is None else set(ROOM_CHARACTER_FIELDS) & set(update_fields)
+    current = {field: loaded_value(instance, field) for field in fields}
+    loaded = instance._loaded_room_fields
+    instance._loaded_room_fields = {**loaded, **current}
+    if raw or created or all(loaded[field] == value for field, value in current.items()):
+        return
+
+    room_ids = set(instance.rooms.values_list('pk', flat=True))
+    room_ids.update(Initiative.objects.filter(character=instance).order_by().values_list('room_id', flat=True).distinct())
+    Room.bump_state_version(room_ids)
@@ -0,0 +1,201 @@
+# rooms/simulation.py
+"""
+Simulador Monte Carlo de encontros.
+
+Cada combate é simulado em paralelo com NumPy: todas as tentativas de um lote
+avançam juntas, turno a turno, como linhas de uma matriz (tentativas x
+combatentes). Lotes grandes são divididos entre processos.
+
+Este módulo não importa nada do Django para poder ser carregado nos processos
+filhos do pool; os personagens chegam já convertidos em `Combatants`.
+
+Regras simplificadas (o modelo Character não guarda armas):
+- lados: personagens jogadores contra NPCs/monstros;
+- cada combatente ataca um inimigo vivo aleatório por turno;
+- ataque: d20 + proficiência + maior modificador entre FOR e DES contra a CA
+  (20 natural sempre acerta e dobra os dados, 1 natural sempre erra);
+- dano: 1d8 + o mesmo modificador, mínimo 1;
+- cada grupo vivo de uma horda é um combatente, como na fila de iniciativa:
+  um ataque por turno e os PV somados das criaturas vivas do grupo.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+PLAYERS = 0
+MONSTERS = 1
+DRAW = -1
+
+PROFICIENCY_BONUS = 2
+DAMAGE_DIE = 8
+DEFAULT_MAX_ROUNDS = 100
+# Abaixo disso o custo de subir processos não compensa
+PARALLEL_THRESHOLD = 20000
+
+
+@dataclass(frozen=True)
+class Combatants:
+    ids: np.ndarray
+    names: tuple
+    sides: np.ndarray
+    hit_points: np.ndarray
+    armor_class: np.ndarray
+    initiative_modifier: np.ndarray
+    attack_bonus: np.ndarray
+    damage_bonus: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def build_combatants(characters, hordes=()):
+    """
+    Converte personagens (Character) e hordas (Horde) nos arrays usados pela
+    simulação; cada grupo vivo de uma horda (`Horde.living_groups`) vira um
+    combatente com os atributos do modelo e os PV somados do grupo.
+    """
+    characters = list(characters)
+    rows = [(c, c.name, max(c.hit_points, 1)) for c in characters]
+    for horde in hordes:
+        hit_points = horde.get_hit_points()
+        groups = horde.group_indices()
+        rows.extend(
+            (horde.template, horde.group_label(group), int(hit_points[groups[group - 1]].sum()))
+            for group in horde.living_groups()
+        )
+
+    best_modifier = np.array(
+        [max(c.strength_modifier, c.dexterity_modifier) for c, _, _ in rows], dtype=np.int64
+    )
+
+    return Combatants(
+        ids=np.array([c.pk for c, _, _ in rows], dtype=np.int64),
+        names=tuple(name for _, name, _ in rows),
+        sides=np.array(
+            [PLAYERS if c.character_type == 'player' else MONSTERS for c, _, _ in rows],
+            dtype=np.int64,
+        ),
+        hit_points=np.array([hit_points for _, _, hit_points in rows], dtype=np.int64),
+        armor_class=np.array([c.armor_class for c, _, _ in rows], dtype=np.int64),
+        initiative_modifier=np.array([c.initiative_modifier for c, _, _ in rows], dtype=np.int64),
+        attack_bonus=best_modifier + PROFICIENCY_BONUS,
+        damage_bonus=best_modifier,
+    )
+
+
+def _simulate_chunk(combatants, trials, seed, max_rounds):
+    """Simula `trials` combates; retorna vencedores, rodadas e sobreviventes por combatente"""
+    rng = np.random.default_rng(seed)
+    count = len(combatants)
+    sides = combatants.sides
+
+    hp = np.tile(combatants.hit_points, (trials, 1))
+    alive = hp > 0
+
+    # Ordem de iniciativa por tentativa; o ruído < 1 desempata aleatoriamente
+    initiative = rng.integers(1, 21, size=(trials, count)) + combatants.initiative_modifier
+    order = np.argsort(-(initiative + rng.random((trials, count))), axis=1)
+
+    winners = np.full(trials, DRAW, dtype=np.int8)
+    rounds = np.full(trials, max_rounds, dtype=np.int64)
+    active = np.ones(trials, dtype=bool)
+
+    for round_number in range(1, max_rounds + 1):
+        for position in range(count):
+            trial_ids = np.flatnonzero(active)
+            if not trial_ids.size:
+                break
+
+            actors = order[trial_ids, position]
+            can_act = alive[trial_ids, actors]
+            trial_ids, actors = trial_ids[can_act], actors[can_act]
+            if not trial_ids.size:
+                continue
+
+            # Alvo: inimigo vivo aleatório
+            enemies = alive[trial_ids] & (sides[None, :] != sides[actors][:, None])
+            targets = np.where(enemies, rng.random(enemies.shape), -1.0).argmax(axis=1)
+
+            d20 = rng.integers(1, 21, size=trial_ids.size)
+            critical = d20 == 20
+            hit = critical | (
+                (d20 != 1) & (d20 + combatants.attack_bonus[actors] >= combatants.armor_class[targets])
+            )
+            damage = rng.integers(1, DAMAGE_DIE + 1, size=trial_ids.size)
+            damage += np.where(critical, rng.integers(1, DAMAGE_DIE + 1, size=trial_ids.size), 0)
+            damage = np.maximum(damage + combatants.damage_bonus[actors], 1) * hit
+
+            hp[trial_ids, targets] -= damage
+            alive[trial_ids, targets] = hp[trial_ids, targets] > 0
+
+            players_alive = (alive[trial_ids] & (sides == PLAYERS)).any(axis=1)
+            monsters_alive = (alive[trial_ids] & (sides == MONSTERS)).any(axis=1)
+            finished = ~(players_alive & monsters_alive)
+            finished_ids = trial_ids[finished]
+            winners[finished_ids] = np.where(players_alive[finished], PLAYERS, MONSTERS)
+            rounds[finished_ids] = round_number
+            active[finished_ids] = False
+
+        if not active.any():
+            break
+
+    return winners, rounds, alive.sum(axis=0)
+
+
+def simulate(combatants, trials=10000, workers=1, seed=None, max_rounds=DEFAULT_MAX_ROUNDS, max_size=None):
+    """
+    Roda `trials` combates e resume o resultado.
+
+    Com `workers` > 1 e lotes grandes, as tentativas são divididas entre
+    processos, cada um com sua própria semente derivada de `seed`. `max_size`
+    limita tentativas x combatentes (o tamanho das matrizes da simulação).
+    """
+    if not set(combatants.sides.tolist()) >= {PLAYERS, MONSTERS}:
+        raise ValueError('O encontro precisa de personagens jogadores e de NPCs/monstros.')
+    if max_size is not None and trials * len(combatants) > max_size:
+        raise ValueError(
+            f'Encontro grande demais: {trials} tentativas x {len(combatants)} combatentes '
+            f'passa do limite de {max_size}. Reduza `trials`.'
+        )
+
+    # Cada processo recebe pelo menos um quarto do limiar de paralelismo
+    if trials < PARALLEL_THRESHOLD:
+        workers = 1
+    else:
+        workers = max(1, min(workers or 1, trials // (PARALLEL_THRESHOLD // 4)))
+
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    chunks = [trials // workers + (1 if i < trials % workers else 0) for i in range(workers)]
+
+    if workers == 1:
+        results = [_simulate_chunk(combatants, trials, seeds[0], max_rounds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                _simulate_chunk,
+                [combatants] * workers, chunks, seeds, [max_rounds] * workers,
+            ))
+
+    winners = np.concatenate([result[0] for result in results])
+    rounds = np.concatenate([result[1] for result in results])
+    survivors = sum(result[2] for result in results)
+    decided = winners != DRAW
+
+    return {
+        'trials': trials,
+        'workers': workers,
+        'players_win_probability': float(np.mean(winners == PLAYERS)),
+        'monsters_win_probability': float(np.mean(winners == MONSTERS)),
+        'draw_probability': float(np.mean(~decided)),
+        'expected_rounds': float(rounds[decided].mean()) if decided.any() else None,
+        'combatants': [
+            {
+                'id': int(combatants.ids[index]),
+                'name': combatants.names[index],
+                'side': 'players' if combatants.sides[index] == PLAYERS else 'monsters',
+                'survival_probability': float(survivors[index] / trials),
+            }
+            for index in range(len(combatants))
+        ],
+    }
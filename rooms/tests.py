@@ -1,3 +1,45 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from characters.models import Character
+from initiative.models import Initiative
+from .models import Room
+
+
+class UndoTests(TestCase):
+    def setUp(self):
+        master = get_user_model().objects.create_user('mestre', password='x', user_type='master')
+        self.room = Room.objects.create(name='Sala', master=master)
+        self.characters = [
+            Character.objects.create(name=f'Goblin {index}', character_type='monster', owner=master)
+            for index in range(3)
+        ]
+        self.room.characters.add(*self.characters[:2])
+
+    def test_undo_next_after_roll_keeps_queue_in_sync(self):
+        self.room.start_initiative()
+        self.room.characters.add(self.characters[2])
+        Initiative.roll_initiative_for_character(self.room, self.characters[2])
+        self.room.refresh_from_db()
+        first = self.room.get_current_turn()
+
+        second = self.room.next_turn()
+        self.assertIsNotNone(self.room.undo_last_action())
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.get_current_turn(), first)
+
+        self.assertEqual(self.room.next_turn(), second)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.get_current_turn(), second)
+        self.assertEqual(self.room.initiative_count, self.room.get_initiative_queue().count())
+
+    def test_undo_stops_at_rank(self):
+        self.room.start_initiative()
+        self.room.characters.add(self.characters[2])
+        Initiative.roll_initiative_for_character(self.room, self.characters[2])
+        self.room.refresh_from_db()
+
+        self.assertIsNone(self.room.undo_last_action())
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.initiative_count, 3)
+        self.assertEqual(self.room.rebuild_from_events()['initiative_count'], 3)
@@ -7,7 +7,17 @@ from . import views
 urlpatterns = [
     # Rotas da API (v1/rooms/)
     path('', views.RoomListCreateView.as_view(), name='api-room-list'),
+    path('join/', views.join_room, name='api-join-room'),
     path('<int:pk>/', views.RoomDetailView.as_view(), name='api-room-detail'),
     path('<int:room_id>/start-initiative/', views.start_initiative, name='api-start-initiative'),
+    path('<int:room_id>/next-turn/', views.next_turn, name='api-next-turn'),
+    path('<int:room_id>/undo/', views.undo_last_action, name='api-undo-last-action'),
+    path('<int:room_id>/spawn/', views.spawn_characters, name='api-spawn-characters'),
+    path('<int:room_id>/hordes/', views.HordeListCreateView.as_view(), name='api-horde-list'),
+    path('<int:room_id>/hordes/<int:pk>/', views.delete_horde, name='api-horde-delete'),
+    path('<int:room_id>/hordes/<int:pk>/damage/', views.damage_horde, name='api-horde-damage'),
+    path('<int:room_id>/simulate/', views.simulate_encounter, name='api-simulate-encounter'),
+    path('<int:room_id>/available-players/', views.AvailablePlayerListView.as_view(), name='api-available-players'),
+    path('<int:room_id>/available-characters/', views.AvailableCharacterListView.as_view(), name='api-available-characters'),
 
 ]
\ No newline at end of file
@@ -5,12 +5,19 @@ from django.urls import reverse_lazy
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from .serializers import RoomSerializer, RoomCreateSerializer
+from .serializers import (
+    RoomSerializer, RoomCreateSerializer, EncounterSimulationSerializer,
+    AvailablePlayerSerializer, AvailableCharacterSerializer, JoinRoomSerializer,
+    NextTurnSerializer, SpawnCharactersSerializer, HordeSerializer, HordeCreateSerializer,
+    HordeDamageSerializer,
+)
+from .pagination import AvailablePlayerPagination, AvailableCharacterPagination
 
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
+from django.conf import settings
 User = get_user_model() 
 from django.db.models import Q
 
@@ -22,7 +29,11 @@ from django.views.generic import (
     ListView, CreateView, UpdateView, DeleteView, DetailView
 )
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from .models import Room
+from .models import Horde, Room, TurnConflictError
+from .event_store import room_state
+from .codes import forget_code, normalize_code, resolve_code
+from .forms import RoomCreateForm, RoomForm
+from .conditional import RoomVersionETagMixin
 
 # ==================== VIEWS BASEADAS EM CLASSE (API - DRF) ====================
 
@@ -37,25 +48,19 @@ class RoomListCreateView(generics.ListCreateAPIView):
         return RoomSerializer
 
     def get_queryset(self):
-        return Room.objects.filter(
-            models.Q(master=self.request.user) | 
-            models.Q(players=self.request.user)
-        ).distinct()
+        return Room.objects.visible_to(self.request.user).with_api_relations()
 
     def perform_create(self, serializer):
         serializer.save(master=self.request.user)
 
 # 2. DETAIL/UPDATE/DELETE API VIEW
-class RoomDetailView(generics.RetrieveUpdateDestroyAPIView):
+class RoomDetailView(RoomVersionETagMixin, generics.RetrieveUpdateDestroyAPIView):
     """API para detalhes, atualização e deleção de sala."""
     serializer_class = RoomSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Room.objects.filter(
-            models.Q(master=self.request.user) | 
-            models.Q(players=self.request.user)
-        ).distinct()
+        return Room.objects.visible_to(self.request.user).with_api_relations()
     
 def player_has_character(self, user):
         """
@@ -88,6 +93,297 @@ def start_initiative(request, room_id):
             status=status.HTTP_404_NOT_FOUND
         )
 
+@api_view(['POST'])
+def next_turn(request, room_id):
+    """
+    Avança o turno da sala.
+    POST /api/v1/rooms/<room_id>/next-turn/  {"expected_turn": 3}
+    """
+    try:
+        room = Room.objects.get(id=room_id, master=request.user)
+    except Room.DoesNotExist:
+        return Response(
+            {'error': 'Sala não encontrada ou você não é o mestre'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    serializer = NextTurnSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        current = room.next_turn(serializer.validated_data.get('expected_turn'))
+    except TurnConflictError as conflict:
+        return Response(
+            {'error': str(conflict), 'state': room_state(conflict.room)},
+            status=status.HTTP_409_CONFLICT
+        )
+    if current is None:
+        return Response(
+            {'error': 'A iniciativa não foi iniciada'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    from initiative.serializers import InitiativeSerializer
+    return Response({
+        'state': room_state(room),
+        'current': InitiativeSerializer(current).data,
+    })
+
+@api_view(['POST'])
+def join_room(request):
+    """
+    Entra em uma sala pelo código de acesso.
+    POST /api/v1/rooms/join/  {"code": "K7QX2M"}
+    """
+    serializer = JoinRoomSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    code = normalize_code(serializer.validated_data['code'])
+    room_id = resolve_code(code)
+    # O cache é por processo: confere de novo código e status para não aceitar uma entrada antiga
+    room = (
+        Room.objects.filter(pk=room_id, code=code, is_active=True).select_related('master').first()
+        if room_id else None
+    )
+    if room is None:
+        forget_code(code)
+        return Response(
+            {'error': 'Código inválido'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    # Mesmas regras de toggle_player_in_room
+    if request.user == room.master or request.user.user_type == 'master':
+        return Response(
+            {'error': 'Mestres não podem entrar como jogadores'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    joined = room.join(request.user)
+    return Response(
+        {
+            'message': 'Você entrou na sala!' if joined else 'Você já está nesta sala.',
+            'room': RoomSerializer(room).data,
+        },
+        status=status.HTTP_201_CREATED if joined else status.HTTP_200_OK
+    )
+
+@api_view(['POST'])
+def undo_last_action(request, room_id):
+    """API para desfazer a última transição de combate (início, turno ou reset) da sala."""
+    try:
+        room = Room.objects.get(id=room_id, master=request.user)
+    except Room.DoesNotExist:
+        return Response(
+            {'error': 'Sala não encontrada ou você não é o mestre'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    event = room.undo_last_action()
+    if event is None:
+        return Response(
+            {'error': 'Nada para desfazer'},
+            status=status.HTTP_409_CONFLICT
+        )
+    return Response({
+        'message': 'Ação desfeita!',
+        'sequence': event.sequence,
+        'state': room_state(room),
+        'room': RoomSerializer(room).data,
+    })
+
+@api_view(['POST'])
+def simulate_encounter(request, room_id):
+    """
+    Simula N combates entre os PJs e os NPCs/monstros da sala (somente o mestre).
+    POST /api/v1/rooms/<room_id>/simulate/  {"trials": 10000, "max_rounds": 100, "seed": 42}
+    """
+    try:
+        room = Room.objects.get(id=room_id, master=request.user)
+    except Room.DoesNotExist:
+        return Response(
+            {'error': 'Sala não encontrada ou você não é o mestre'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    serializer = EncounterSimulationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        # Um processo só na requisição; lotes paralelos ficam com o comando simulate_encounter
+        report = room.simulate_encounter(
+            workers=1, max_size=settings.ENCOUNTER_SIMULATION_MAX_SIZE, **serializer.validated_data
+        )
+    except ValueError as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report)
+
+@api_view(['POST'])
+def spawn_characters(request, room_id):
+    """
+    Coloca N cópias de um NPC/monstro do mestre na sala de uma vez.
+    POST /api/v1/rooms/<room_id>/spawn/  {"template_id": 7, "count": 40, "hit_points_variance": 2}
+    (ou "hit_points_roll": "2d6" para rolar os PV de cada cópia)
+    """
+    try:
+        room = Room.objects.get(id=room_id, master=request.user)
+    except Room.DoesNotExist:
+        return Response(
+            {'error': 'Sala não encontrada ou você não é o mestre'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    serializer = SpawnCharactersSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    template = Character.objects.filter(
+        pk=data['template_id'], owner=request.user, character_type__in=['npc', 'monster']
+    ).first()
+    if template is None:
+        return Response(
+            {'error': 'Modelo não encontrado (use um NPC ou monstro seu)'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    clones = room.spawn_characters(
+        template, data['count'],
+        hit_points_variance=data['hit_points_variance'],
+        hit_points_roll=data.get('hit_points_roll'),
+    )
+    return Response({
+        'message': f'{len(clones)} cópias de {template.name} adicionadas à sala!',
+        'characters': [
+            {'id': clone.pk, 'name': clone.name, 'hit_points': clone.hit_points} for clone in clones
+        ],
+    }, status=status.HTTP_201_CREATED)
+
+class HordeListCreateView(RoomVersionETagMixin, generics.ListCreateAPIView):
+    """
+    Hordas da sala (participantes) e criação de hordas (mestre)
+    GET/POST /api/v1/rooms/<room_id>/hordes/
+    POST: {"template_id": 7, "size": 300, "initiative_groups": 3, "hit_points_roll": "2d8+4"}
+    """
+    serializer_class = HordeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    room_url_kwarg = 'room_id'
+
+    def get_queryset(self):
+        room = get_object_or_404(Room.objects.visible_to(self.request.user).only('id'), pk=self.kwargs['room_id'])
+        return Horde.objects.filter(room=room).select_related('template')
+
+    def create(self, request, *args, **kwargs):
+        room = get_object_or_404(Room, pk=self.kwargs['room_id'], master=request.user)
+        serializer = HordeCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        template = Character.objects.filter(
+            pk=data['template_id'], owner=request.user, character_type__in=['npc', 'monster']
+        ).first()
+        if template is None:
+            return Response(
+                {'error': 'Modelo não encontrado (use um NPC ou monstro seu)'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if Horde.objects.filter(room=room, template=template).exists():
+            return Response(
+                {'error': 'Já existe uma horda deste modelo na sala'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        horde = Horde.create_for_room(
+            room, template, data['size'],
+            name=data.get('name'),
+            initiative_groups=data['initiative_groups'],
+            hit_points_variance=data['hit_points_variance'],
+            hit_points_roll=data.get('hit_points_roll'),
+        )
+        return Response(HordeSerializer(horde).data, status=status.HTTP_201_CREATED)
+
+@api_view(['DELETE'])
+def delete_horde(request, room_id, pk):
+    """Remove a horda (e seus grupos da fila) — DELETE /api/v1/rooms/<room_id>/hordes/<pk>/"""
+    horde = get_object_or_404(Horde, pk=pk, room_id=room_id, room__master=request.user)
+    horde.remove()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+@api_view(['POST'])
+def damage_horde(request, room_id, pk):
+    """
+    Dano (ou cura, com valor negativo) em criaturas da horda
+    POST /api/v1/rooms/<room_id>/hordes/<pk>/damage/  {"amount": 7, "instances": [0, 4, 5]}
+    Sem "instances", atinge todas as criaturas vivas (ex.: bola de fogo).
+    """
+    horde = get_object_or_404(Horde, pk=pk, room_id=room_id, room__master=request.user)
+    serializer = HordeDamageSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        horde.apply_damage(serializer.validated_data['amount'], serializer.validated_data.get('instances'))
+    except IndexError as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(HordeSerializer(horde).data)
+
+# Seletores da página da sala (busca por prefixo, paginados por cursor)
+class RoomPickerMixin:
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_room(self):
+        return get_object_or_404(Room, pk=self.kwargs['room_id'], master=self.request.user)
+
+    def get_search(self):
+        return self.request.query_params.get('q', '').strip()
+
+
+class AvailablePlayerListView(RoomPickerMixin, generics.ListAPIView):
+    """
+    Jogadores que o mestre pode adicionar à sala.
+    GET /api/v1/rooms/<room_id>/available-players/?q=<prefixo>&cursor=...
+    """
+    serializer_class = AvailablePlayerSerializer
+    pagination_class = AvailablePlayerPagination
+
+    def get_queryset(self):
+        room = self.get_room()
+        queryset = User.objects.filter(user_type='player').exclude(
+            Q(pk=room.master_id) | Q(pk__in=room.players.values('pk'))
+        ).only('id', 'username')
+
+        search = self.get_search()
+        if search:
+            # startswith usa o índice único de username
+            queryset = queryset.filter(username__startswith=search)
+        return queryset
+
+
+class AvailableCharacterListView(RoomPickerMixin, generics.ListAPIView):
+    """
+    Personagens que o mestre pode adicionar: PJs de qualquer jogador e os
+    próprios NPCs/monstros, que ainda não estão na sala.
+    GET /api/v1/rooms/<room_id>/available-characters/?q=<prefixo>&cursor=...
+    """
+    serializer_class = AvailableCharacterSerializer
+    pagination_class = AvailableCharacterPagination
+
+    def get_queryset(self):
+        room = self.get_room()
+        queryset = Character.objects.filter(
+            Q(character_type='player') | Q(owner=self.request.user, character_type__in=['npc', 'monster'])
+        ).exclude(
+            pk__in=room.characters.values('pk')
+        ).select_related('owner').only('id', 'name', 'character_type', 'owner__username')
+
+        search = self.get_search()
+        if search:
+            queryset = queryset.filter(name__startswith=search)
+        return queryset
+
 # ==================== VIEWS BASEADAS EM CLASSE (Templates - Django CBV) ====================
 
 # Mixin de permissão para Rooms (somente Master da Sala tem acesso)
@@ -108,16 +404,13 @@ class RoomListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         user = self.request.user
-        return Room.objects.filter(
-            models.Q(master=user) | 
-            models.Q(players=user)
-        ).distinct().select_related('master').prefetch_related('players') 
+        return Room.objects.visible_to(user).select_related('master').prefetch_related('players')
         
 # 2. CRIAÇÃO DE SALA (Template: room-create-template)
 class RoomCreateView(LoginRequiredMixin, CreateView):
     """Cria uma nova sala para o usuário logado."""
     model = Room
-    fields = ['name', 'description', 'story', 'code']
+    form_class = RoomCreateForm
     template_name = 'rooms/room_form.html'
     
     def form_valid(self, form):
@@ -134,10 +427,13 @@ class RoomDetailTemplateView(LoginRequiredMixin, DetailView):
     model = Room
     template_name = 'rooms/room_detail.html'
     context_object_name = 'room'
+
+    def get_queryset(self):
+        return Room.objects.select_related('master').prefetch_related('players')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        room = self.get_object()
+        room = self.object
         user = self.request.user
         
         # --- 1. Lógica de Gestão de Personagens ---
@@ -150,32 +446,10 @@ class RoomDetailTemplateView(LoginRequiredMixin, DetailView):
                 # Usa o método que definimos no rooms/models.py
                 not room.player_has_character(user) 
             )
-            
-            # Personagens disponíveis (SÓ VISÍVEL PARA O MESTRE)
-            if user == room.master:
-                
-                # Filtra personagens disponíveis:
-                # 1. PJs (character_type='player') de qualquer dono 
-                #    QUE AINDA NÃO ESTÃO NA SALA.
-                # 2. NPCs e Monstros (character_type in ['npc', 'monster']) que SÃO do Mestre (owner=user).
-                
-                available_characters_qs = Character.objects.filter(
-                    Q(character_type='player') | Q(owner=user, character_type__in=['npc', 'monster'])
-                ).exclude(
-                    rooms=room
-                ).order_by('character_type', 'name')
-                
-                context['available_characters'] = available_characters_qs
-            # --- Fim da Lógica de Gestão de Personagens ---
-
-            # --- 2. Lógica de Gestão de Jogadores (EXISTENTE) ---
-            players_in_room_pks = room.players.values_list('pk', flat=True)
-            
-            context['all_users'] = User.objects.filter(user_type='player').exclude(
-                Q(pk=user.pk) | Q(pk__in=players_in_room_pks)
-            ).order_by('username')
-            # --- Fim da Lógica de Gestão de Jogadores ---
 
+        # Personagens e jogadores disponíveis (SÓ PARA O MESTRE) são carregados
+        # sob demanda pela página via AvailableCharacterListView/AvailablePlayerListView,
+        # então o custo da página não depende do total de usuários do site.
         return context
 
     
@@ -184,7 +458,7 @@ class RoomDetailTemplateView(LoginRequiredMixin, DetailView):
 class RoomUpdateView(RoomMasterRequiredMixin, UpdateView):
     """Permite que o mestre da sala atualize os dados."""
     model = Room
-    fields = ['name', 'description', 'story', 'code', 'is_active']
+    form_class = RoomForm
     template_name = 'rooms/room_form.html'
     
     def get_success_url(self):